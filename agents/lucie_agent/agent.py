@@ -12,23 +12,25 @@ See ARCHITECTURE.md for full documentation.
 """
 
 import asyncio
+import functools
+import re
+import threading
 from typing import TypedDict, Annotated, Sequence, Literal
-from datetime import datetime
 from pathlib import Path
 from langchain_core.messages import BaseMessage, HumanMessage, AIMessage, SystemMessage, ToolMessage
 from langchain_anthropic import ChatAnthropic
 from . import retry as retry_module
 from .retry import ChatAnthropicWithRetry, set_retry_event_queue
 from langgraph.graph import StateGraph, END
-from langgraph.prebuilt import ToolNode
 from langgraph.graph.message import add_messages
 from collections import defaultdict
 
+from .cache import response_cache
 from .config import settings
+from .logutil import LOG_STDOUT, QueuedLogWriter, format_timestamp
 from .tools import ALL_TOOLS
-from .prompts import build_system_prompt
-from .summarizer import summarize_tool_calls, format_summaries_for_context, ToolCallSummary
-from .retry import is_rate_limit_error
+from .prompts import build_system_blocks
+from .retry import classify_error
 
 
 # Tool call type
@@ -44,24 +46,28 @@ class ToolCall(TypedDict):
 class AgentResponse(TypedDict):
     """Response from running the agent."""
     response: str
-    tool_summary: ToolCallSummary | None
-    tool_calls: list[ToolCall]  # Raw tool calls for storage
+    tool_calls: list[ToolCall]  # Raw tool calls for storage and summarization
 
 
 # Log file for agent/classifier
 AGENT_LOG_FILE = Path(__file__).parent / "agent.log"
 
-# Configure retry module to use the same log file
-retry_module.RETRY_LOG_FILE = AGENT_LOG_FILE
+# Queued background writer (see logutil): the hot path never pays the
+# open/write/close syscalls - the classifier alone emits ~10 lines per
+# request.
+_LOG_WRITER = QueuedLogWriter(AGENT_LOG_FILE, "agent-log-writer")
 
 
 def _log_agent(message: str):
-    """Write to agent log file (no truncation)."""
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
-    log_line = f"[{timestamp}] {message}"
-    print(log_line)
-    with open(AGENT_LOG_FILE, "a", encoding="utf-8") as f:
-        f.write(log_line + "\n")
+    """Queue a log line for the background writer (no I/O on the caller)."""
+    log_line = f"[{format_timestamp()}] {message}"
+    if LOG_STDOUT:
+        print(log_line)
+    _LOG_WRITER.put((log_line + "\n").encode("utf-8", "replace"))
+
+
+# Retry events share the batched agent.log pipeline
+retry_module.LOG_SINK = _log_agent
 
 
 # Intent types
@@ -76,61 +82,220 @@ Tu peux aussi :
 - Visiter mon site : https://luciformresearch.com
 """.strip()
 
-# Off-topic guidance (included in system prompt context)
-OFF_TOPIC_GUIDANCE = """
-Si la question est hors-sujet (pas liée à mon travail/projets), redirige poliment vers mes domaines d'expertise.
-"""
+# Static off-topic redirections - an off-topic message doesn't deserve an
+# LLM round-trip just to say "let's talk about my work instead".
+OFF_TOPIC_RESPONSE_FR = """
+Je préfère rester sur mes domaines d'expertise ! Je peux te parler de mes projets (RagForge, CodeParsers, XMLParser, Community-Docs), de systèmes RAG, de parsing de code ou de mon parcours. Qu'est-ce qui t'intéresse ?
+""".strip()
+
+OFF_TOPIC_RESPONSE_EN = """
+I'd rather stick to my areas of expertise! I can tell you about my projects (RagForge, CodeParsers, XMLParser, Community-Docs), RAG systems, code parsing, or my background. What would you like to know?
+""".strip()
 
 
 # Language type
 Language = Literal["FR", "EN"]
 
+# Exact-match cache for classifier decisions, keyed on the normalized
+# (user message, truncated assistant context) pair. Trivial repeats
+# ("oui", "ok", "contact?") skip the Haiku round-trip entirely.
+_CLASSIFIER_CACHE: dict[tuple[str, str], tuple[Intent, Language]] = {}
+_CLASSIFIER_CACHE_MAX = 2048
+_classifier_cache_stats = {"hits": 0, "misses": 0}
+
+# Hit/miss counters for the speculative response call - logged per turn so
+# the speculated (intent, language) defaults can be tuned against traffic.
+_speculation_stats = {"hits": 0, "misses": 0}
+
+# Short confirmation words that continue the current topic - no LLM needed
+# when there is a previous assistant message to continue from.
+_SHORT_FOLLOWUP_FR = re.compile(r"^(oui|ok|okay|d'accord|continue|vas-y|ouais|merci)[\s!.?]*$")
+_SHORT_FOLLOWUP_EN = re.compile(r"^(ok|okay|yes|yep|sure|continue|go on|go|thanks)[\s!.?]*$")
+
+
+def _shortcut_classify(user_message: str, last_assistant_message: str) -> tuple[Intent, Language] | None:
+    """Classify trivial short follow-ups without any LLM call."""
+    stripped = user_message.strip().lower()
+    if not last_assistant_message or len(stripped.split()) > 3:
+        return None
+    if _SHORT_FOLLOWUP_FR.match(stripped) or _SHORT_FOLLOWUP_EN.match(stripped):
+        # A confirmation continues the conversation, so the language should
+        # follow the previous assistant message - the word itself is often
+        # ambiguous ("ok", "continue" and "merci" read the same both ways).
+        return "TECHNIQUE", _guess_language(last_assistant_message)
+    return None
+
+
+# Deterministic intent prefilter for high-confidence patterns - a regex
+# match costs microseconds vs a full Haiku round-trip. Only short messages
+# are matched: keywords like "github" appear in genuinely technical
+# questions too, and longer messages deserve the real classifier.
+# All intent keyword sets are compiled into one alternation with named
+# groups, so classification is a single scan and `match.lastgroup` is the
+# intent label directly.
+_FAST_CLASSIFY_MAX_LEN = 40
+_INTENT_KEYWORD_RE = re.compile(
+    "|".join([
+        r"(?P<CONTACT>\b(?:email|e-mail|mail|contact|contacter|joindre|reach|twitter|github|linkedin|site)\b)",
+        r"(?P<CODE>\b(?:montre|show me|snippet|code sample|exemple de code)\b)",
+        r"(?P<PERSONNEL>^(?:bonjour|salut|coucou|hello|hi|hey)[\s!.?]*$)",
+    ]),
+    re.I,
+)
+_fast_path_stats = {"hits": 0, "misses": 0}
+
+# Classifier output parser: one C-level scan extracting category and
+# language together, tolerant of case and surrounding chatter.
+_INTENT_RE = re.compile(
+    r"(TECHNIQUE|PERSONNEL|CODE|CONTACT|OFF_TOPIC)\s*\|\s*(FR|EN)", re.I
+)
+
+# Language heuristic: accents are a strong French signal, stopword counts
+# break the remaining ties. Ties default to FR like the rest of the agent.
+_ACCENT_RE = re.compile(r"[àâäéèêëîïôöùûüç]")
+_WORD_RE = re.compile(r"[a-zà-ÿ']+")
+_FR_STOPWORDS = frozenset(
+    "le la les un une des du je tu il elle on nous vous est et ou mais donc "
+    "que qui quoi comment pourquoi ton ta tes mon ma mes ce cette c'est".split()
+)
+_EN_STOPWORDS = frozenset(
+    "the a an is are was and or but how what why your my this that "
+    "you i it of to do does can could show me about".split()
+)
+
+
+def _guess_language(text: str) -> Language:
+    """Guess FR/EN from accents plus weighted stopword counts."""
+    lowered = text.lower()
+    fr_score = 2 * len(_ACCENT_RE.findall(lowered))
+    en_score = 0
+    for word in _WORD_RE.findall(lowered):
+        if word in _FR_STOPWORDS:
+            fr_score += 1
+        elif word in _EN_STOPWORDS:
+            en_score += 1
+    return "FR" if fr_score >= en_score else "EN"
+
+
+def _fast_classify(user_message: str) -> Intent | None:
+    """Classify high-confidence short messages without an LLM call."""
+    text = user_message.strip()
+    if not text or len(text) > _FAST_CLASSIFY_MAX_LEN:
+        return None
+    match = _INTENT_KEYWORD_RE.search(text)
+    return match.lastgroup if match else None
+
+
+def _classifier_cache_get(key: tuple[str, str]) -> tuple[Intent, Language] | None:
+    """Look up a cached classification and track hit/miss stats."""
+    cached = _CLASSIFIER_CACHE.get(key)
+    if cached is not None:
+        _classifier_cache_stats["hits"] += 1
+    else:
+        _classifier_cache_stats["misses"] += 1
+    return cached
+
+
+def _classifier_cache_put(key: tuple[str, str], value: tuple[Intent, Language]):
+    """Store a classification, evicting the oldest entry when full."""
+    if len(_CLASSIFIER_CACHE) >= _CLASSIFIER_CACHE_MAX:
+        _CLASSIFIER_CACHE.pop(next(iter(_CLASSIFIER_CACHE)))
+    _CLASSIFIER_CACHE[key] = value
+
+# Static classifier rubric, sent as a cache_control system block so the
+# API serves it from the prompt cache - only the short dynamic part
+# (context + user message) costs fresh tokens on each classification.
+CLASSIFICATION_SYSTEM_BLOCKS = [{
+    "type": "text",
+    "text": """Classify the user's message. Output ONLY "CATEGORY|LANG", nothing else.
+
+CATEGORIES:
+- TECHNIQUE: projects, code, tech, implementation, follow-ups like "ok/oui/continue"
+- PERSONNEL: background, experience, motivations, personality
+- CODE: requests to see specific code examples
+- CONTACT: email, social media, how to reach
+- OFF_TOPIC: unrelated to work/projects
+
+LANG: FR=French, EN=English/other""",
+    "cache_control": {"type": "ephemeral"},
+}]
+
+# Dynamic part of the classifier input, hoisted so the hot path only does
+# one %-interpolation instead of assembling a multi-line f-string.
+_CLASSIFIER_INPUT_TMPL_CTX = (
+    'Previous assistant message (for context): "%s"\n\nMessage: "%s"\n\nOutput:'
+)
+_CLASSIFIER_INPUT_TMPL = 'Message: "%s"\n\nOutput:'
+
+
+# Tool lookup table, built once at import instead of per tool-node call
+_TOOL_REGISTRY = {t.name: t for t in ALL_TOOLS}
+
+
+def _extract_text(content) -> str:
+    """
+    Normalize AIMessage content (str or list of text blocks) to plain text.
+
+    Runs per streamed token, so the common str case is checked first with
+    exact-type tests instead of ABC-routed isinstance.
+    """
+    if content.__class__ is str:
+        return content
+    if content.__class__ is list:
+        parts = []
+        for block in content:
+            block_cls = block.__class__
+            if block_cls is str:
+                parts.append(block)
+            elif block_cls is dict and block.get("type") == "text":
+                parts.append(block.get("text", ""))
+        return "".join(parts)
+    return str(content)
+
+
 # Agent state with intent and language
 class AgentState(TypedDict):
     """State for the agent graph."""
     messages: Annotated[Sequence[BaseMessage], add_messages]
     conversation_id: str
+    conversation_context: str | None
     intent: Intent | None
     language: Language | None
+    speculative_response: AIMessage | None
 
 
-def create_agent(model_name: str | None = None):
+@functools.lru_cache(maxsize=None)
+def _get_llm(kind: str, model: str):
     """
-    Create and return the compiled LangGraph agent with intent routing.
+    Build (or reuse) an LLM client for the given role and model.
 
-    Args:
-        model_name: Override model name (default: settings.model_name)
+    Memoized so the primary and fallback agents share the Haiku-backed
+    classifier and simple clients instead of constructing duplicates, and
+    so the bind_tools result is reused per model.
     """
-    use_model = model_name or settings.model_name
-    _log_agent(f"Creating agent with model: {use_model}")
-
-    # LLM for classification (fast, cheap) - always use Haiku
-    # Using ChatAnthropicWithRetry for proper exponential backoff on rate limits
-    classifier_llm = ChatAnthropicWithRetry(
-        model="claude-3-5-haiku-20241022",
-        api_key=settings.anthropic_api_key,
-        temperature=0,
-        max_tokens=50,
-        # Custom retry config (shorter delays for classifier since it's fast)
-        retry_max_attempts=5,
-        retry_base_delay_ms=30000,  # 30 seconds for classifier (smaller requests)
-    )
-
-    # LLM for responses (with tools)
-    # Using ChatAnthropicWithRetry for proper exponential backoff on rate limits
-    response_llm = ChatAnthropicWithRetry(
-        model=use_model,
-        api_key=settings.anthropic_api_key,
-        temperature=settings.temperature,
-        max_tokens=4096,
-        # Custom retry config (longer delays for main LLM due to larger requests)
-        retry_max_attempts=5,
-        retry_base_delay_ms=60000,  # 1 minute base delay
-    ).bind_tools(ALL_TOOLS)
-
-    # LLM for responses (without tools - always Haiku for speed/cost)
-    simple_llm = ChatAnthropicWithRetry(
-        model="claude-3-5-haiku-20241022",
+    if kind == "classifier":
+        # Classification (fast, cheap) with shorter retry delays
+        return ChatAnthropicWithRetry(
+            model=model,
+            api_key=settings.anthropic_api_key,
+            temperature=0,
+            max_tokens=50,
+            retry_max_attempts=5,
+            retry_base_delay_ms=30000,  # 30 seconds for classifier (smaller requests)
+        )
+    if kind == "response":
+        # Responses with tools, longer delays due to larger requests
+        return ChatAnthropicWithRetry(
+            model=model,
+            api_key=settings.anthropic_api_key,
+            temperature=settings.temperature,
+            max_tokens=4096,
+            retry_max_attempts=5,
+            retry_base_delay_ms=60000,  # 1 minute base delay
+        ).bind_tools(ALL_TOOLS)
+    # "simple": responses without tools (always Haiku for speed/cost)
+    return ChatAnthropicWithRetry(
+        model=model,
         api_key=settings.anthropic_api_key,
         temperature=settings.temperature,
         max_tokens=2048,
@@ -138,121 +303,211 @@ def create_agent(model_name: str | None = None):
         retry_base_delay_ms=30000,  # Shorter delay for Haiku
     )
 
-    # Classifier node
-    def classify_intent(state: AgentState) -> dict:
-        """Classify the user's intent with conversation context."""
+
+def create_agent(model_name: str | None = None):
+    """
+    Create and return the compiled LangGraph agent with intent routing.
+
+    Args:
+        model_name: Override model name (default: settings.model_name)
+    """
+    use_model = model_name or settings.model_name
+    _log_agent(f"Creating agent with model: {use_model}")
+
+    classifier_llm = _get_llm("classifier", "claude-3-5-haiku-20241022")
+    response_llm = _get_llm("response", use_model)
+    simple_llm = _get_llm("simple", "claude-3-5-haiku-20241022")
+
+    # Classifier node (also speculatively starts the tool-bound LLM call)
+    async def classify_and_speculate(state: AgentState) -> dict:
+        """
+        Classify the user's intent with conversation context.
+
+        Most messages route to agent_with_tools, so the tool-bound LLM call
+        is fired speculatively in parallel with the classifier. If the
+        classifier picks a non-technical intent (or a language other than
+        the speculated default), the speculative call is cancelled and its
+        result discarded - otherwise the classifier round-trip is fully
+        hidden behind the main LLM call.
+        """
         messages = state["messages"]
         conversation_id = state.get("conversation_id", "")
 
-        # Find the last human message and previous assistant message for context
+        # Find the last human message and previous assistant message for
+        # context. Both always live near the end, so only the tail slice is
+        # scanned - long tool loops don't make this O(N) - and type()
+        # instead of isinstance skips the MRO lookup on this hot path.
         user_message = ""
         last_assistant_message = ""
 
-        for msg in reversed(messages):
-            if isinstance(msg, HumanMessage) and not user_message:
-                user_message = msg.content
-            elif isinstance(msg, AIMessage) and not last_assistant_message:
-                # Get the last assistant message for context (full content for better classification)
-                content = msg.content if isinstance(msg.content, str) else str(msg.content)
-                last_assistant_message = content
+        for msg in reversed(messages[-8:]):
+            msg_type = type(msg)
+            if msg_type is HumanMessage and not user_message:
+                user_message = _extract_text(msg.content)
+            elif msg_type is AIMessage and not last_assistant_message:
+                # Full content for better classification
+                last_assistant_message = _extract_text(msg.content)
             if user_message and last_assistant_message:
                 break
 
-        # Build context-aware classification prompt
+        # Fast paths: short confirmation words and exact repeats skip Haiku
+        shortcut = _shortcut_classify(user_message, last_assistant_message)
+        if shortcut is not None:
+            intent, language = shortcut
+            _log_agent(f"CLASSIFIER SHORTCUT: {intent}|{language} for {user_message!r}")
+            return {"intent": intent, "language": language, "speculative_response": None}
+
+        cache_key = (user_message.strip().lower(), last_assistant_message[:300])
+        cached = _classifier_cache_get(cache_key)
+        if cached is not None:
+            intent, language = cached
+            stats = _classifier_cache_stats
+            _log_agent(
+                f"CLASSIFIER CACHE HIT: {intent}|{language} "
+                f"(hits={stats['hits']}, misses={stats['misses']}, size={len(_CLASSIFIER_CACHE)})"
+            )
+            return {"intent": intent, "language": language, "speculative_response": None}
+
+        fast_intent = _fast_classify(user_message)
+        if fast_intent is not None:
+            _fast_path_stats["hits"] += 1
+            language = _guess_language(user_message)
+            _log_agent(
+                f"CLASSIFIER FAST PATH: {fast_intent}|{language} for {user_message!r} "
+                f"(hits={_fast_path_stats['hits']}, misses={_fast_path_stats['misses']})"
+            )
+            # Feed the exact-match cache so repeats stay on the fast tier
+            _classifier_cache_put(cache_key, (fast_intent, language))
+            return {"intent": fast_intent, "language": language, "speculative_response": None}
+        _fast_path_stats["misses"] += 1
+
+        # Only the dynamic part is built per request - the rubric lives in
+        # the static CLASSIFICATION_SYSTEM_BLOCKS above and is prompt-cached.
         # Note: Tool summaries are now included in conversation_context from community-docs API
-        context_section = ""
         if last_assistant_message:
-            context_section = f"""
-Previous assistant message (for context): "{last_assistant_message}"
-"""
-
-        classification_prompt = f"""Classify this message. Output ONLY "CATEGORY|LANG", nothing else.
-
-CATEGORIES:
-- TECHNIQUE: projects, code, tech, implementation, follow-ups like "ok/oui/continue"
-- PERSONNEL: background, experience, motivations, personality
-- CODE: requests to see specific code examples
-- CONTACT: email, social media, how to reach
-- OFF_TOPIC: unrelated to work/projects
-
-LANG: FR=French, EN=English/other
-{context_section}
-Message: "{user_message}"
-
-Output:"""
+            classifier_input = _CLASSIFIER_INPUT_TMPL_CTX % (last_assistant_message, user_message)
+        else:
+            classifier_input = _CLASSIFIER_INPUT_TMPL % user_message
 
-        # Log the full classifier prompt
+        # Log the classifier input
         _log_agent(f"\n{'='*80}")
         _log_agent(f"CLASSIFIER - Conversation: {conversation_id}")
         _log_agent(f"{'='*80}")
         _log_agent(f"USER MESSAGE: {user_message}")
         _log_agent(f"LAST ASSISTANT: {last_assistant_message}")
         _log_agent(f"{'-'*80}")
-        _log_agent(f"FULL CLASSIFICATION PROMPT:\n{classification_prompt}")
+        _log_agent(f"CLASSIFIER INPUT:\n{classifier_input}")
         _log_agent(f"{'-'*80}")
 
-        response = classifier_llm.invoke([HumanMessage(content=classification_prompt)])
-        response_text = response.content.strip().upper()
-
-        # Parse intent and language (format: "CATEGORY|LANGUAGE")
-        # Only take the first line in case LLM adds extra text
-        first_line = response_text.split("\n")[0].strip()
-        parts = first_line.split("|")
-        intent_text = parts[0].strip() if parts else ""
-        language_text = parts[1].strip() if len(parts) > 1 else "EN"
-
-        # Parse intent
-        if "TECHNIQUE" in intent_text:
-            intent = "TECHNIQUE"
-        elif "PERSONNEL" in intent_text:
-            intent = "PERSONNEL"
-        elif "CODE" in intent_text:
-            intent = "CODE"
-        elif "CONTACT" in intent_text:
-            intent = "CONTACT"
-        else:
-            intent = "OFF_TOPIC"
+        async def _classify_streaming() -> str:
+            """
+            Stream the classifier and stop as soon as the answer is complete.
+
+            The rubric forces an output of the form "CATEGORY|LANG", so once
+            a '|' followed by two language letters has arrived there is
+            nothing left to decode - closing the stream early saves the tail
+            of the generation (and the stop-token round trip).
+            """
+            parts: list[str] = []
+            stream = classifier_llm.astream(
+                [
+                    SystemMessage(content=CLASSIFICATION_SYSTEM_BLOCKS),
+                    HumanMessage(content=classifier_input),
+                ],
+                config={"tags": ["intent_classifier"]},
+            )
+            async for chunk in stream:
+                text = _extract_text(chunk.content) if chunk.content else ""
+                if not text:
+                    continue
+                parts.append(text)
+                buf = "".join(parts)
+                sep_index = buf.find("|")
+                if sep_index != -1 and len(buf[sep_index + 1:].strip()) >= 2:
+                    await stream.aclose()
+                    break
+            return "".join(parts)
+
+        # Fire the classifier and a speculative tool-bound response concurrently.
+        # The speculation uses the default language (FR) since the real one
+        # is not known yet - it is only kept when the classifier agrees.
+        classifier_task = asyncio.ensure_future(_classify_streaming())
+        # Tagged so the streaming layer can buffer these tokens until the
+        # classifier confirms the route - forwarded eagerly they would
+        # reach the user even when the speculation is discarded.
+        speculative_task = asyncio.ensure_future(
+            response_llm.ainvoke(
+                build_messages_for_llm(state),
+                config={"tags": ["speculative_response"]},
+            )
+        )
 
-        # Parse language
-        language: Language = "FR" if "FR" in language_text else "EN"
+        try:
+            classifier_output = await classifier_task
+        except Exception:
+            speculative_task.cancel()
+            raise
+
+        # Parse "CATEGORY|LANGUAGE" in one regex pass (tolerant of case and
+        # any extra text the LLM wraps around it)
+        match = _INTENT_RE.search(classifier_output)
+        if match:
+            intent = match.group(1).upper()
+            language: Language = match.group(2).upper()
+        else:
+            intent, language = "OFF_TOPIC", "EN"
+
+        _classifier_cache_put(cache_key, (intent, language))
+
+        # Keep the speculative response only when it matches the routing
+        # decision; otherwise cancel it so no tokens are wasted.
+        speculative_response = None
+        if intent in ("TECHNIQUE", "CODE") and language == "FR":
+            try:
+                speculative_response = await speculative_task
+            except Exception as e:
+                _log_agent(f"Speculative response failed, will re-invoke: {e}")
+        else:
+            speculative_task.cancel()
+            try:
+                await speculative_task
+            except (asyncio.CancelledError, Exception):
+                pass
+
+        if speculative_response is not None:
+            _speculation_stats["hits"] += 1
+        else:
+            _speculation_stats["misses"] += 1
 
-        _log_agent(f"CLASSIFIER RAW RESPONSE: {repr(response_text)}")
-        _log_agent(f"FIRST LINE: {repr(first_line)}")
+        _log_agent(f"CLASSIFIER RAW RESPONSE: {repr(classifier_output)}")
         _log_agent(f"PARSED INTENT: {intent}, LANGUAGE: {language}")
+        _log_agent(
+            f"SPECULATIVE RESPONSE USED: {speculative_response is not None} "
+            f"(hits={_speculation_stats['hits']}, misses={_speculation_stats['misses']})"
+        )
         _log_agent(f"{'='*80}\n")
 
-        return {"intent": intent, "language": language}
+        return {
+            "intent": intent,
+            "language": language,
+            "speculative_response": speculative_response,
+        }
 
     # Helper to build messages with correct language prompt
     def build_messages_for_llm(state: AgentState) -> list[BaseMessage]:
         """Build message list with language-appropriate system prompt."""
         language = state.get("language", "FR")
-        messages = list(state["messages"])
 
-        # Find and extract conversation context from original system message
-        conversation_context = None
-        human_messages = []
-
-        for msg in messages:
-            if isinstance(msg, SystemMessage):
-                content = msg.content if isinstance(msg.content, str) else str(msg.content)
-                if "## Contexte de conversation" in content:
-                    parts = content.split("## Contexte de conversation")
-                    if len(parts) > 1:
-                        conversation_context = parts[1].strip()
-                elif "## Conversation context" in content:
-                    parts = content.split("## Conversation context")
-                    if len(parts) > 1:
-                        conversation_context = parts[1].strip()
-            else:
-                human_messages.append(msg)
-
-        # Build new system prompt with detected language
-        system_prompt = build_system_prompt(conversation_context, language)
+        # The conversation context rides in its own state field (set once at
+        # graph entry), so no system-message scanning or parsing is needed -
+        # just pick the memoized block list for the detected language. The
+        # static persona block carries cache_control=ephemeral, so Anthropic
+        # serves the cached prefix on every turn.
+        system_blocks = build_system_blocks(state.get("conversation_context"), language)
 
         _log_agent(f"[BUILD_MESSAGES] Language: {language}")
 
-        return [SystemMessage(content=system_prompt)] + human_messages
+        return [SystemMessage(content=system_blocks)] + list(state["messages"])
 
     # Route based on intent
     def route_by_intent(state: AgentState) -> str:
@@ -268,17 +523,24 @@ Output:"""
             return "persona_response"
 
     # Agent with tools (for TECHNIQUE and CODE)
-    def call_model_with_tools(state: AgentState) -> dict:
+    async def call_model_with_tools(state: AgentState) -> dict:
         """Call the LLM with tools for technical questions."""
+        # Emit the speculative response from the classifier node directly
+        # instead of re-invoking the LLM (first iteration only - the tool
+        # loop clears it and goes through the normal path).
+        speculative = state.get("speculative_response")
+        if speculative is not None:
+            return {"messages": [speculative], "speculative_response": None}
+
         messages = build_messages_for_llm(state)
-        response = response_llm.invoke(messages)
+        response = await response_llm.ainvoke(messages)
         return {"messages": [response]}
 
     # Simple persona response (for PERSONNEL)
-    def call_persona_response(state: AgentState) -> dict:
+    async def call_persona_response(state: AgentState) -> dict:
         """Direct persona response without tools."""
         messages = build_messages_for_llm(state)
-        response = simple_llm.invoke(messages)
+        response = await simple_llm.ainvoke(messages)
         return {"messages": [response]}
 
     # Contact response
@@ -286,12 +548,47 @@ Output:"""
         """Return contact information."""
         return {"messages": [AIMessage(content=CONTACT_INFO)]}
 
-    # Off-topic response (now uses LLM for context-aware redirection)
+    # Off-topic response (static, like contact_response - no LLM call)
     def off_topic_response(state: AgentState) -> dict:
-        """Redirect off-topic questions with context awareness."""
-        messages = build_messages_for_llm(state)
-        response = simple_llm.invoke(messages)
-        return {"messages": [response]}
+        """Redirect off-topic questions to Lucie's areas of expertise."""
+        if state.get("language") == "EN":
+            return {"messages": [AIMessage(content=OFF_TOPIC_RESPONSE_EN)]}
+        return {"messages": [AIMessage(content=OFF_TOPIC_RESPONSE_FR)]}
+
+    # Parallel tool execution (replaces the sequential prebuilt ToolNode).
+    # When the model plans several tool calls in one message (e.g. a KB
+    # search plus a code lookup), they fan out concurrently so the tool
+    # phase costs max(latencies) instead of their sum.
+    async def run_tools(state: AgentState) -> dict:
+        """Execute all tool calls from the last AI message concurrently."""
+        last_message = state["messages"][-1]
+
+        async def run_one(tc: dict):
+            # A hallucinated tool name must fail inside the gather so it
+            # becomes an error ToolMessage like any other tool failure,
+            # not a KeyError that aborts the whole turn.
+            registered = _TOOL_REGISTRY.get(tc["name"])
+            if registered is None:
+                raise ValueError(
+                    f"unknown tool {tc['name']!r}, available: {', '.join(_TOOL_REGISTRY)}"
+                )
+            return await registered.ainvoke(tc["args"])
+
+        results = await asyncio.gather(
+            *(run_one(tc) for tc in last_message.tool_calls),
+            return_exceptions=True,
+        )
+        # A failed tool becomes an error ToolMessage instead of aborting the
+        # whole turn - the model can still answer from the calls that worked.
+        tool_messages = []
+        for result, tc in zip(results, last_message.tool_calls):
+            if isinstance(result, BaseException):
+                _log_agent(f"Tool {tc['name']} failed: {result}")
+                content = f"Error executing {tc['name']}: {result}"
+            else:
+                content = str(result)
+            tool_messages.append(ToolMessage(content=content, tool_call_id=tc["id"]))
+        return {"messages": tool_messages}
 
     # Should continue with tools?
     def should_continue(state: AgentState) -> str:
@@ -307,12 +604,12 @@ Output:"""
     workflow = StateGraph(AgentState)
 
     # Add nodes
-    workflow.add_node("classifier", classify_intent)
+    workflow.add_node("classifier", classify_and_speculate)
     workflow.add_node("agent_with_tools", call_model_with_tools)
     workflow.add_node("persona_response", call_persona_response)
     workflow.add_node("contact_response", contact_response)
     workflow.add_node("off_topic_response", off_topic_response)
-    workflow.add_node("tools", ToolNode(ALL_TOOLS))
+    workflow.add_node("tools", run_tools)
 
     # Set entry point
     workflow.set_entry_point("classifier")
@@ -354,21 +651,30 @@ Output:"""
 # Global agent instances (primary and fallback)
 _primary_agent = None
 _fallback_agent = None
+_agent_lock = threading.Lock()
 
 
 def get_agent(use_fallback: bool = False):
-    """Get or create the agent instance (primary or fallback)."""
+    """Get or create the agent instance (primary or fallback).
+
+    Guarded by a lock so concurrent first requests under multiple server
+    threads cannot compile the same graph twice.
+    """
     global _primary_agent, _fallback_agent
 
     if use_fallback:
         if _fallback_agent is None:
-            _log_agent(f"Creating FALLBACK agent with model: {settings.fallback_model_name}")
-            _fallback_agent = create_agent(model_name=settings.fallback_model_name)
+            with _agent_lock:
+                if _fallback_agent is None:
+                    _log_agent(f"Creating FALLBACK agent with model: {settings.fallback_model_name}")
+                    _fallback_agent = create_agent(model_name=settings.fallback_model_name)
         return _fallback_agent
     else:
         if _primary_agent is None:
-            _log_agent(f"Creating PRIMARY agent with model: {settings.model_name}")
-            _primary_agent = create_agent(model_name=settings.model_name)
+            with _agent_lock:
+                if _primary_agent is None:
+                    _log_agent(f"Creating PRIMARY agent with model: {settings.model_name}")
+                    _primary_agent = create_agent(model_name=settings.model_name)
         return _primary_agent
 
 
@@ -388,20 +694,26 @@ async def run_agent(
     Returns:
         AgentResponse with response text and optional tool_summary
     """
-    agent = get_agent()
+    # Whole-response cache: repeated questions in the same conversation
+    # context are served without running the graph at all. Per-intent TTLs
+    # decide what gets stored (CODE answers never are).
+    cached_response = response_cache.get(message, conversation_context)
+    if cached_response is not None:
+        _log_agent(f"RESPONSE CACHE HIT for {message!r}")
+        return cached_response
 
-    # Build initial system prompt (will be replaced after language detection)
-    system_prompt = build_system_prompt(conversation_context, "FR")
+    agent = get_agent()
 
-    # Create initial state
+    # Create initial state. The conversation context travels as its own
+    # field; each response node builds the language-appropriate system
+    # prompt from it, so no placeholder SystemMessage is needed.
     initial_state: AgentState = {
-        "messages": [
-            SystemMessage(content=system_prompt),
-            HumanMessage(content=message),
-        ],
+        "messages": [HumanMessage(content=message)],
         "conversation_id": conversation_id,
+        "conversation_context": conversation_context,
         "intent": None,
         "language": None,
+        "speculative_response": None,
     }
 
     # Run the agent (retry logic is built into ChatAnthropic with max_retries)
@@ -413,17 +725,24 @@ async def run_agent(
         # Extract messages
         messages = result.get("messages", [])
 
-        # Extract tool calls from messages for summarization
+        # Single forward pass: collect tool calls for summarization and
+        # remember the last AI content on the way (avoids a second
+        # reversed() traversal with isinstance checks per message).
         tool_calls = []
+        final_ai_content = None
         for msg in messages:
-            if isinstance(msg, AIMessage) and hasattr(msg, "tool_calls") and msg.tool_calls:
-                for tc in msg.tool_calls:
-                    tool_calls.append({
-                        "name": tc.get("name", "unknown"),
-                        "args": tc.get("args", {}),
-                        "result": ""  # Will be filled from ToolMessage
-                    })
-            elif isinstance(msg, ToolMessage):
+            msg_type = type(msg)
+            if msg_type is AIMessage:
+                if msg.tool_calls:
+                    for tc in msg.tool_calls:
+                        tool_calls.append({
+                            "name": tc.get("name", "unknown"),
+                            "args": tc.get("args", {}),
+                            "result": ""  # Will be filled from ToolMessage
+                        })
+                if msg.content:
+                    final_ai_content = msg.content
+            elif msg_type is ToolMessage:
                 # Match tool result with the corresponding call
                 if tool_calls and not tool_calls[-1]["result"]:
                     result_str = str(msg.content)
@@ -431,53 +750,27 @@ async def run_agent(
                     # Add preview (first 500 chars)
                     tool_calls[-1]["preview"] = result_str[:500] + "..." if len(result_str) > 500 else result_str
 
-        # Extract the final AI message
-        response_text = ""
-        for msg in reversed(messages):
-            if isinstance(msg, AIMessage) and msg.content:
-                # Return content, handling potential list format
-                if isinstance(msg.content, list):
-                    # Extract text from content blocks
-                    text_parts = []
-                    for block in msg.content:
-                        if isinstance(block, dict) and block.get("type") == "text":
-                            text_parts.append(block.get("text", ""))
-                        elif isinstance(block, str):
-                            text_parts.append(block)
-                    response_text = "\n".join(text_parts)
-                else:
-                    response_text = msg.content
-                break
+        # Extract the final AI message text
+        response_text = _extract_text(final_ai_content) if final_ai_content is not None else ""
 
         if not response_text:
             response_text = "Je n'ai pas pu generer de reponse."
 
-        # Generate tool summary if tools were called
-        tool_summary = None
-        if tool_calls:
-            _log_agent(f"\n{'='*80}")
-            _log_agent(f"GENERATING SUMMARY (non-streaming) - {len(tool_calls)} tool call(s)")
-            _log_agent(f"Conversation: {conversation_id}")
-            _log_agent(f"{'='*80}")
-
-            tool_summary = summarize_tool_calls(message, tool_calls, response_text)
-            if tool_summary:
-                _log_agent(f"SUMMARY GENERATED:")
-                _log_agent(f"  key_findings: {tool_summary['key_findings']}")
-                _log_agent(f"  assistant_action: {tool_summary['assistant_action']}")
-            _log_agent(f"{'='*80}\n")
-
-        return {
+        # Summarization is deferred to the caller (background task) so the
+        # response is returned as soon as the graph finishes.
+        agent_response: AgentResponse = {
             "response": response_text,
-            "tool_summary": tool_summary,
             "tool_calls": tool_calls
         }
 
+        response_cache.put(message, conversation_context, result.get("intent"), agent_response)
+
+        return agent_response
+
     except Exception as e:
         _log_agent(f"❌ Agent error: {str(e)}")
         return {
             "response": f"Erreur lors de l'execution de l'agent: {str(e)}",
-            "tool_summary": None,
             "tool_calls": []
         }
 
@@ -506,18 +799,15 @@ async def run_agent_streaming(
     BACKOFF_MULTIPLIER = 1.5
     MAX_JITTER_MS = 10000
 
-    # Build initial system prompt (will be replaced after language detection)
-    system_prompt = build_system_prompt(conversation_context, "FR")
-
-    # Create initial state
+    # Create initial state (context as its own field, no placeholder
+    # SystemMessage - see run_agent)
     initial_state: AgentState = {
-        "messages": [
-            SystemMessage(content=system_prompt),
-            HumanMessage(content=message),
-        ],
+        "messages": [HumanMessage(content=message)],
         "conversation_id": conversation_id,
+        "conversation_context": conversation_context,
         "intent": None,
         "language": None,
+        "speculative_response": None,
     }
 
     config = {"recursion_limit": settings.max_iterations * 2}
@@ -526,50 +816,80 @@ async def run_agent_streaming(
         """Inner function to stream with a specific agent."""
         tool_calls = []
         current_tool = None
-        full_response = ""
-
+        # Speculative-response tokens are held here until the classifier
+        # resolves: if it routes elsewhere (or to EN) the speculation is
+        # discarded, and any tokens already forwarded would have reached
+        # the user - on WhatsApp the flushed paragraphs are irrevocable.
+        spec_buffer: list[str] = []
+        spec_resolved = False
+
+        # Hot loop: token events fire for every streamed token, so avoid
+        # throwaway default dicts and ABC-routed isinstance checks here.
         async for event in agent.astream_events(initial_state, config=config, version="v2"):
-            kind = event.get("event")
-
-            # Get the current node from metadata to filter classifier tokens
-            metadata = event.get("metadata", {})
-            langgraph_node = metadata.get("langgraph_node", "")
+            kind = event["event"]
 
             if kind == "on_chat_model_stream":
-                # Skip classifier tokens - only stream from response nodes
-                if langgraph_node == "classifier":
+                # Skip classifier tokens - only stream from response LLMs.
+                # Filtering is tag-based (not node-based) because the
+                # speculative response call also runs inside the classifier
+                # node.
+                tags = event.get("tags") or ()
+                if "intent_classifier" in tags:
                     continue
 
                 # Streaming token from the LLM
-                chunk = event.get("data", {}).get("chunk")
-                if chunk and hasattr(chunk, "content"):
-                    content = chunk.content
-                    if content:
-                        # Handle both string and list content
-                        if isinstance(content, list):
-                            for block in content:
-                                if isinstance(block, dict) and block.get("type") == "text":
-                                    text = block.get("text", "")
-                                    full_response += text
-                                    yield {"type": "token", "content": text}
-                                elif isinstance(block, str):
-                                    full_response += block
-                                    yield {"type": "token", "content": block}
+                data = event.get("data")
+                chunk = data.get("chunk") if data else None
+                content = chunk.content if chunk is not None else None
+                if content:
+                    text = _extract_text(content)
+                    if text:
+                        if "speculative_response" in tags and not spec_resolved:
+                            spec_buffer.append(text)
                         else:
-                            full_response += content
-                            yield {"type": "token", "content": content}
+                            yield {"type": "token", "content": text}
+
+            elif kind == "on_chain_end":
+                name = event.get("name")
+                if name == "classifier":
+                    # The classifier decided: replay the buffered speculative
+                    # tokens if its output kept the speculation, drop them if
+                    # the call was cancelled or its language/intent mismatched.
+                    spec_resolved = True
+                    if spec_buffer:
+                        output = (event.get("data") or {}).get("output")
+                        kept = (
+                            isinstance(output, dict)
+                            and output.get("speculative_response") is not None
+                        )
+                        if kept:
+                            yield {"type": "token", "content": "".join(spec_buffer)}
+                        spec_buffer.clear()
+                elif name in ("contact_response", "off_topic_response"):
+                    # Static nodes return a ready-made AIMessage without any
+                    # LLM call, so no on_chat_model_stream events fire for
+                    # them - emit their content as a token here or these
+                    # turns would stream nothing at all.
+                    output = (event.get("data") or {}).get("output")
+                    if isinstance(output, dict):
+                        for msg in output.get("messages", ()):
+                            text = _extract_text(msg.content)
+                            if text:
+                                yield {"type": "token", "content": text}
 
             elif kind == "on_tool_start":
                 # Tool is starting
                 tool_name = event.get("name", "unknown")
-                tool_input = event.get("data", {}).get("input", {})
+                data = event.get("data")
+                tool_input = data.get("input", {}) if data else {}
                 current_tool = {"name": tool_name, "args": tool_input}
                 yield {"type": "tool_start", "name": tool_name, "args": tool_input}
 
             elif kind == "on_tool_end":
                 # Tool finished
                 tool_name = event.get("name", "unknown")
-                raw_output = event.get("data", {}).get("output", "")
+                data = event.get("data")
+                raw_output = data.get("output", "") if data else ""
                 # Extract actual content from tool output
                 if hasattr(raw_output, "content"):
                     output_str = str(raw_output.content)
@@ -583,26 +903,8 @@ async def run_agent_streaming(
                     current_tool = None
                 yield {"type": "tool_end", "name": tool_name, "output": output_str}
 
-        # Generate and yield summary if tools were called
-        if tool_calls:
-            _log_agent(f"\n{'='*80}")
-            _log_agent(f"GENERATING SUMMARY ({model_name}) - {len(tool_calls)} tool call(s)")
-            _log_agent(f"Conversation: {conversation_id}")
-            _log_agent(f"{'='*80}")
-
-            summary = summarize_tool_calls(message, tool_calls, full_response)
-            if summary:
-                _log_agent(f"SUMMARY GENERATED:")
-                _log_agent(f"  key_findings: {summary['key_findings']}")
-                _log_agent(f"  assistant_action: {summary['assistant_action']}")
-                yield {
-                    "type": "tool_summary",
-                    "user_question": summary["user_question"],
-                    "tools_used": summary["tools_used"],
-                    "key_findings": summary["key_findings"],
-                    "assistant_action": summary["assistant_action"],
-                }
-            _log_agent(f"{'='*80}\n")
+        # Summarization happens in a background task on the caller side -
+        # the stream ends as soon as the last token is delivered.
 
     # Main retry loop
     attempt = 0
@@ -630,17 +932,22 @@ async def run_agent_streaming(
             _log_agent(f"[STREAM] Error on attempt {attempt + 1}: {error_str}")
 
             # Check if it's a rate limit error
-            if not is_rate_limit_error(e):
+            is_rate_limit, retry_after = classify_error(e)
+            if not is_rate_limit:
                 _log_agent(f"[STREAM] Non-rate-limit error, not retrying")
                 yield {"type": "error", "content": error_str}
                 break
 
             # Rate limit error - check if we should retry or fallback
             if not use_fallback and attempt < MAX_RETRIES_BEFORE_FALLBACK:
-                # Calculate delay with exponential backoff + jitter
-                jitter = random.random() * MAX_JITTER_MS
-                delay_ms = BASE_DELAY_MS * (BACKOFF_MULTIPLIER ** attempt) + jitter
-                delay_seconds = delay_ms / 1000
+                if retry_after is not None:
+                    # Server told us when the window resets - trust it
+                    delay_seconds = retry_after + random.random()
+                else:
+                    # Calculate delay with exponential backoff + jitter
+                    jitter = random.random() * MAX_JITTER_MS
+                    delay_ms = BASE_DELAY_MS * (BACKOFF_MULTIPLIER ** attempt) + jitter
+                    delay_seconds = delay_ms / 1000
 
                 _log_agent(f"[STREAM] Rate limited, retry {attempt + 1}/{MAX_RETRIES_BEFORE_FALLBACK} in {delay_seconds:.1f}s")
 
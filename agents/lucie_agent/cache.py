@@ -0,0 +1,97 @@
+"""
+Whole-response cache for Lucie Agent.
+
+FAQ-style questions ("qui es-tu ?", "c'est quoi RagForge ?") arrive many
+times per day with only trivial variations. Re-running the full graph for
+each one costs a classifier call plus a response LLM call. This module
+caches complete AgentResponse payloads keyed on the normalized user
+message plus a hash of the conversation context, so repeats are answered
+without touching the API at all.
+
+TTLs are per-intent: PERSONNEL/CONTACT/OFF_TOPIC answers are stable for a
+day, TECHNIQUE answers track the indexed code base and expire after an
+hour, and CODE answers are never cached (tool results may change between
+ingestions).
+"""
+
+import hashlib
+import time
+
+
+# How long a cached answer stays valid, per intent. Intents absent from
+# this table (CODE) are never cached.
+INTENT_TTL_SECONDS: dict[str, float] = {
+    "PERSONNEL": 24 * 3600.0,
+    "CONTACT": 24 * 3600.0,
+    "OFF_TOPIC": 24 * 3600.0,
+    "TECHNIQUE": 3600.0,
+}
+
+# One precomputed translation table folds French accents to their base
+# letters and turns punctuation into spaces - a single C-level pass,
+# replacing the unicodedata decomposition + two regex substitutions that
+# ran per lookup.
+_NORMALIZE_TBL = str.maketrans(
+    "àâäéèêëîïôöùûüÿç" + "!?.,;:'\"()",
+    "aaaeeeeiioouuuyc" + " " * 10,
+)
+
+
+def normalize_message(message: str) -> str:
+    """Normalize a user message into a cache key (casefold, strip accents/punctuation)."""
+    return " ".join(message.casefold().translate(_NORMALIZE_TBL).split())
+
+
+def _make_key(message: str, conversation_context: str | None) -> str:
+    """Build the cache key from the normalized message and context hash."""
+    if conversation_context:
+        ctx_hash = hashlib.blake2b(
+            conversation_context.encode(), digest_size=8
+        ).hexdigest()
+    else:
+        ctx_hash = ""
+    return f"{normalize_message(message)}|{ctx_hash}"
+
+
+class ResponseCache:
+    """Bounded TTL cache mapping normalized (message, context) pairs to AgentResponse dicts."""
+
+    def __init__(self, maxsize: int = 512):
+        self.maxsize = maxsize
+        self._entries: dict[str, tuple[float, dict]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, message: str, conversation_context: str | None = None) -> dict | None:
+        """Return a cached response for the message, or None on miss/expiry."""
+        key = _make_key(message, conversation_context)
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, response = entry
+            if time.monotonic() < expires_at:
+                self.hits += 1
+                return response
+            del self._entries[key]
+        self.misses += 1
+        return None
+
+    def put(
+        self,
+        message: str,
+        conversation_context: str | None,
+        intent: str | None,
+        response: dict,
+    ):
+        """Cache a response with the TTL of its intent (no-op for uncached intents)."""
+        ttl = INTENT_TTL_SECONDS.get(intent) if intent else None
+        if ttl is None:
+            return
+        if len(self._entries) >= self.maxsize:
+            # Evict the oldest insertion (dicts preserve insertion order)
+            self._entries.pop(next(iter(self._entries)))
+        key = _make_key(message, conversation_context)
+        self._entries[key] = (time.monotonic() + ttl, response)
+
+
+# Shared cache instance used by run_agent
+response_cache = ResponseCache()
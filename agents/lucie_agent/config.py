@@ -60,6 +60,11 @@ class Settings(BaseSettings):
         default=10,
         env="RATE_LIMIT_PER_MINUTE"
     )
+    anthropic_requests_per_minute: int = Field(
+        default=50,
+        env="ANTHROPIC_REQUESTS_PER_MINUTE",
+        description="Proactive pacing budget for outgoing Anthropic calls (token bucket)"
+    )
 
     # Twilio WhatsApp
     twilio_account_sid: str = Field(
@@ -75,6 +80,11 @@ class Settings(BaseSettings):
         env="TWILIO_WHATSAPP_NUMBER",
         description="Twilio WhatsApp number (e.g., +14155238886 for sandbox)"
     )
+    twilio_max_concurrency: int = Field(
+        default=10,
+        env="TWILIO_MAX_CONCURRENCY",
+        description="Max concurrent outbound Twilio sends (stays under the per-account cap)"
+    )
 
     class Config:
         env_file = str(_CONFIG_DIR / ".env")
@@ -0,0 +1,31 @@
+"""
+JSON helpers for Lucie Agent.
+
+Uses orjson when available - roughly 3-5x faster than stdlib json for the
+string-heavy payloads this service serializes (SSE frames, tool payloads,
+memory API bodies) - with a stdlib fallback so it stays an optional
+dependency. Both variants return/accept UTF-8 bytes, which is what the
+SSE and httpx call sites want anyway.
+"""
+
+try:
+    import orjson
+
+    def dumps(obj) -> bytes:
+        """Serialize obj to compact UTF-8 JSON bytes."""
+        return orjson.dumps(obj)
+
+    def loads(data):
+        """Deserialize JSON from str or bytes."""
+        return orjson.loads(data)
+
+except ImportError:
+    import json as _json
+
+    def dumps(obj) -> bytes:
+        """Serialize obj to compact UTF-8 JSON bytes (stdlib fallback)."""
+        return _json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode()
+
+    def loads(data):
+        """Deserialize JSON from str or bytes (stdlib fallback)."""
+        return _json.loads(data)
@@ -0,0 +1,89 @@
+"""
+Shared logging helpers for the agent modules.
+
+Every logger in the package needs the same two pieces, previously
+copy-pasted per module:
+
+- format_timestamp(): 'YYYY-MM-DD HH:MM:SS.mmm' with a per-second
+  strftime cache - strftime goes through C locale code and allocates,
+  and several helpers can fire within the same second.
+- QueuedLogWriter: a per-file background writer. Lines are queued as
+  pre-encoded bytes and drained in batches by a daemon thread, so hot
+  paths (often on the event loop) pay a queue push instead of disk I/O.
+"""
+
+import atexit
+import os
+import queue
+import threading
+import time
+
+# Mirroring every log line to stdout is handy in dev but doubles the I/O
+# in production (and stdout may itself block under a slow supervisor
+# pipe). One gate for all writers.
+LOG_STDOUT = os.getenv("LUCIE_LOG_STDOUT", "0") == "1"
+
+# The second-resolution part of the timestamp is cached and only the
+# millisecond suffix is computed per line.
+_ts_cache: tuple[int, str] = (0, "")
+
+
+def format_timestamp() -> str:
+    """Format 'YYYY-MM-DD HH:MM:SS.mmm' with a per-second strftime cache."""
+    global _ts_cache
+    sec, ns_rem = divmod(time.time_ns(), 1_000_000_000)
+    if sec != _ts_cache[0]:
+        _ts_cache = (sec, time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(sec)))
+    return f"{_ts_cache[1]}.{ns_rem // 1_000_000:03d}"
+
+
+class QueuedLogWriter:
+    """Batched background writer for one append-only log file.
+
+    Callers queue pre-encoded UTF-8 bytes; a daemon thread drains the
+    queue in batches so each batch costs one write syscall, and the
+    binary append handle stays open for the process life. Still-queued
+    lines are flushed at interpreter exit.
+    """
+
+    def __init__(
+        self,
+        path,
+        thread_name: str,
+        batch_size: int = 64,
+        batch_timeout: float = 0.05,
+    ):
+        self._queue: "queue.SimpleQueue[bytes]" = queue.SimpleQueue()
+        self._fp = open(path, "ab", buffering=64 * 1024)
+        self._batch_size = batch_size
+        self._batch_timeout = batch_timeout
+        threading.Thread(target=self._loop, daemon=True, name=thread_name).start()
+        atexit.register(self.drain)
+
+    def put(self, data: bytes) -> None:
+        """Queue pre-encoded bytes for the background writer (no I/O here)."""
+        self._queue.put(data)
+
+    def _loop(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            try:
+                while len(batch) < self._batch_size:
+                    batch.append(self._queue.get(timeout=self._batch_timeout))
+            except queue.Empty:
+                pass
+            self._fp.write(b"".join(batch))
+            self._fp.flush()
+
+    def drain(self) -> None:
+        """Write any still-queued lines (registered atexit)."""
+        lines = []
+        try:
+            while True:
+                lines.append(self._queue.get_nowait())
+        except queue.Empty:
+            pass
+        if lines:
+            self._fp.write(b"".join(lines))
+        self._fp.flush()
+        self._fp.close()
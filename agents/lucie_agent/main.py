@@ -5,46 +5,164 @@ Exposes the LangGraph agent via HTTP endpoints with SSE streaming support.
 Uses visitor-based conversations (no auth required).
 """
 
-import json
+import asyncio
+import logging
+import logging.handlers
+import os
+import queue
 import time
+from collections import OrderedDict, deque
 from contextlib import asynccontextmanager
 from datetime import datetime
 from pathlib import Path
 from typing import Optional
-from collections import defaultdict
 
 import httpx
-from fastapi import FastAPI, HTTPException, Request
+from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, TypeAdapter
+from sse_starlette.sse import EventSourceResponse
 
+from . import jsonutil
 from .config import settings
-from .agent import run_agent, run_agent_streaming
+from .agent import get_agent, run_agent, run_agent_streaming
+from .logutil import format_timestamp
 from .memory import (
     get_or_create_conversation,
     add_message,
     get_conversation_context,
     get_messages,
     add_tool_summary,
+    close_client as close_memory_client,
 )
+from .retry import _HTTP2, close_shared_http_clients
+from .summarizer import summarize_tool_calls_async
 from .tools import cleanup as cleanup_tools
 
 
+# Console logging goes through a QueueHandler -> QueueListener pair so the
+# event loop never blocks on a stderr write (print holds the GIL for the
+# whole syscall). %-style arguments are only formatted when a record is
+# actually emitted, so disabled levels cost a single enabled-check.
+logger = logging.getLogger("lucie_agent")
+if not logger.handlers:
+    _log_record_queue: queue.SimpleQueue = queue.SimpleQueue()
+    logger.addHandler(logging.handlers.QueueHandler(_log_record_queue))
+    logger.setLevel(logging.INFO)
+    _console_handler = logging.StreamHandler()
+    _console_handler.setFormatter(logging.Formatter("[Lucie Agent] %(message)s"))
+    _log_listener = logging.handlers.QueueListener(_log_record_queue, _console_handler)
+    _log_listener.start()
+
+
+# Background tasks (tool summarization) that must finish before shutdown
+_background_tasks: set[asyncio.Task] = set()
+
+
+def _spawn_background(coro) -> asyncio.Task:
+    """Run a coroutine in the background, tracked for shutdown draining."""
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return task
+
+
+async def _store_assistant(
+    client: httpx.AsyncClient, visitor_id: str, response: str, stored_tool_calls: list[dict] | None
+):
+    """Persist the assistant message off the critical path."""
+    try:
+        await add_message(client, visitor_id, "assistant", response, stored_tool_calls)
+        if stored_tool_calls:
+            logger.info("[%s] Stored %d tool call(s)", visitor_id, len(stored_tool_calls))
+    except Exception as e:
+        logger.warning("Failed to store response: %s", e)
+
+
+async def _summarize_and_store(
+    client: httpx.AsyncClient, visitor_id: str, user_message: str, tool_calls: list[dict], response: str
+):
+    """Generate the tool summary off the critical path and store it."""
+    try:
+        summary = await summarize_tool_calls_async(user_message, tool_calls, response)
+        if summary:
+            await add_tool_summary(
+                client,
+                visitor_id,
+                summary.get("user_question", ""),
+                summary.get("tools_used", []),
+                summary.get("key_findings", ""),
+                summary.get("assistant_action", "")
+            )
+            logger.info("[%s] Tool summary stored (background)", visitor_id)
+    except Exception as e:
+        logger.warning("Failed to store tool summary: %s", e)
+
+
 # Conversation log file
 CONVERSATION_LOG = Path(__file__).parent / "conversation.log"
 
+# Log fragments are queued and written by a background task - the old
+# open/write/flush per call meant three blocking syscalls per streamed
+# token, stalling the event loop mid-SSE. The handle stays open for the
+# process life and batches are written in one syscall.
+_CONV_LOG_HANDLE = open(CONVERSATION_LOG, "ab", buffering=1 << 16)
+_conv_log_queue: asyncio.Queue = asyncio.Queue()
+_CONV_LOG_BATCH_MAX = 256
+
 
 def _log_write(message: str):
-    """Write to conversation log with flush for real-time."""
-    with open(CONVERSATION_LOG, "a", encoding="utf-8") as f:
-        f.write(message)
-        f.flush()
+    """Queue a conversation-log fragment (no I/O on the caller)."""
+    _conv_log_queue.put_nowait(message.encode("utf-8", "replace"))
+
+
+def _log_flush():
+    """Request a flush of the conversation log (queued after prior fragments)."""
+    _conv_log_queue.put_nowait(None)
+
+
+async def _conv_log_drain():
+    """Drain queued conversation-log fragments in batches (background task)."""
+    while True:
+        batch = [await _conv_log_queue.get()]
+        try:
+            while len(batch) < _CONV_LOG_BATCH_MAX:
+                batch.append(_conv_log_queue.get_nowait())
+        except asyncio.QueueEmpty:
+            pass
+        # None is the flush marker queued at conversation end - batches in
+        # the middle of a turn just land in the 64 KiB buffer. The actual
+        # file I/O runs in a worker thread so even a slow disk (or a buffer
+        # spill) never stalls in-flight SSE streams on the event loop.
+        parts = [item for item in batch if item is not None]
+        await asyncio.to_thread(
+            _write_conv_log_batch, b"".join(parts), len(parts) != len(batch)
+        )
+
+
+def _write_conv_log_batch(data: bytes, flush: bool):
+    """Blocking write+flush for one batch (called via asyncio.to_thread)."""
+    if data:
+        _CONV_LOG_HANDLE.write(data)
+    if flush:
+        _CONV_LOG_HANDLE.flush()
+
+
+def _flush_conv_log_queue():
+    """Write any still-queued fragments (shutdown path)."""
+    parts = []
+    while not _conv_log_queue.empty():
+        item = _conv_log_queue.get_nowait()
+        if item is not None:
+            parts.append(item)
+    if parts:
+        _CONV_LOG_HANDLE.write(b"".join(parts))
+    _CONV_LOG_HANDLE.flush()
 
 
 def log_conversation_start(visitor_id: str, conversation_id: str, mode: str, user_message: str):
     """Log the start of a conversation turn (real-time)."""
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+    timestamp = format_timestamp()
     _log_write(f"\n{'='*80}\n")
     _log_write(f"[{timestamp}] CONVERSATION - {mode.upper()}\n")
     _log_write(f"{'='*80}\n")
@@ -63,13 +181,15 @@ def log_token(token: str):
 
 def log_tool_call(tool_name: str, event: str):
     """Log a tool call event (start/end)."""
-    timestamp = datetime.now().strftime("%H:%M:%S")
+    # Slice HH:MM:SS out of the cached full timestamp
+    timestamp = format_timestamp()[11:19]
     _log_write(f"\n[{timestamp}] 🔧 TOOL {event.upper()}: {tool_name}\n")
 
 
 def log_conversation_end():
     """Log the end of a conversation turn."""
     _log_write(f"\n{'='*80}\n\n")
+    _log_flush()
 
 
 def log_conversation(
@@ -82,32 +202,58 @@ def log_conversation(
     tool_calls: list[dict] | None = None,
 ):
     """Log complete conversation turn to file (for non-streaming mode)."""
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+    timestamp = format_timestamp()
+
+    lines = [
+        f"\n{'='*80}\n",
+        f"[{timestamp}] CONVERSATION - {mode.upper()}\n",
+        f"{'='*80}\n",
+        f"Visitor: {visitor_id}\n",
+        f"Conversation: {conversation_id}\n",
+        f"{'-'*80}\n",
+        f"USER MESSAGE:\n{user_message}\n",
+        f"{'-'*80}\n",
+    ]
+
+    if tool_calls:
+        lines.append(f"TOOL CALLS ({len(tool_calls)}):\n")
+        for tc in tool_calls:
+            lines.append(f"  - {tc.get('name', 'unknown')}\n")
+        lines.append(f"{'-'*80}\n")
+
+    lines.append(f"RESPONSE:\n{full_response}\n")
+    lines.append(f"{'='*80}\n\n")
+    _log_write("".join(lines))
+    _log_flush()
 
-    with open(CONVERSATION_LOG, "a", encoding="utf-8") as f:
-        f.write(f"\n{'='*80}\n")
-        f.write(f"[{timestamp}] CONVERSATION - {mode.upper()}\n")
-        f.write(f"{'='*80}\n")
-        f.write(f"Visitor: {visitor_id}\n")
-        f.write(f"Conversation: {conversation_id}\n")
-        f.write(f"{'-'*80}\n")
-        f.write(f"USER MESSAGE:\n{user_message}\n")
-        f.write(f"{'-'*80}\n")
 
-        if tool_calls:
-            f.write(f"TOOL CALLS ({len(tool_calls)}):\n")
-            for tc in tool_calls:
-                f.write(f"  - {tc.get('name', 'unknown')}\n")
-            f.write(f"{'-'*80}\n")
+class _LRUBuckets(OrderedDict):
+    """Token-bucket store with an LRU cap.
 
-        f.write(f"RESPONSE:\n{full_response}\n")
-        f.write(f"{'='*80}\n\n")
+    The periodic sweeper only evicts idle buckets, so an attacker cycling
+    through spoofed IPs or visitor ids inside one window could still grow
+    the dicts without bound. Capping at maxsize keys (~16 B each) bounds
+    memory regardless of traffic; evicting the least recently refilled
+    bucket only ever forgives the stalest client.
+    """
+
+    def __init__(self, maxsize: int = 100_000):
+        super().__init__()
+        self.maxsize = maxsize
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.move_to_end(key)
+        if len(self) > self.maxsize:
+            self.popitem(last=False)
 
 
-# Rate limiting storage
-rate_limit_ip_minute: dict[str, list[float]] = defaultdict(list)  # Anti-spam
-rate_limit_ip_daily: dict[str, list[float]] = defaultdict(list)  # Daily quota par IP
-rate_limit_visitor_daily: dict[str, list[float]] = defaultdict(list)  # Daily quota par visitor
+# Rate limiting storage - token buckets, one (tokens, last_refill) pair per
+# key. Admission is O(1) and memory stays constant per key, instead of
+# keeping (and re-filtering) one timestamp per remembered request.
+rate_limit_ip_minute = _LRUBuckets()  # Anti-spam
+rate_limit_ip_daily = _LRUBuckets()  # Daily quota par IP
+rate_limit_visitor_daily = _LRUBuckets()  # Daily quota par visitor
 
 # Whitelisted IPs (no rate limit for local debugging)
 WHITELISTED_IPS = {"127.0.0.1", "localhost", "::1"}
@@ -117,6 +263,46 @@ DAILY_LIMIT = 15  # Max messages per day (par IP ET par visitor)
 IP_MINUTE_LIMIT = 5  # Anti-spam: max requests per IP per minute
 
 
+def _bucket_refill(
+    buckets: dict[str, tuple[float, float]],
+    key: str,
+    limit: int,
+    window: float,
+    now: float,
+) -> float:
+    """Refill a token bucket at limit/window rate and return its token count."""
+    tokens, last_refill = buckets.get(key, (float(limit), now))
+    tokens = min(float(limit), tokens + (now - last_refill) * (limit / window))
+    buckets[key] = (tokens, now)
+    return tokens
+
+
+# Stale buckets are pruned by a periodic background task instead of on the
+# request path - a bucket idle for at least its window would be refilled to
+# full anyway, so dropping it loses no information.
+_RATE_LIMIT_SWEEP_INTERVAL = 3600  # seconds
+
+
+def _sweep_rate_limit_buckets():
+    """Drop buckets that have been idle long enough to be fully refilled."""
+    now = time.monotonic()
+    for buckets, window in (
+        (rate_limit_ip_minute, 60),
+        (rate_limit_ip_daily, 86400),
+        (rate_limit_visitor_daily, 86400),
+    ):
+        stale = [key for key, (_, last_refill) in buckets.items() if now - last_refill >= window]
+        for key in stale:
+            del buckets[key]
+
+
+async def _rate_limit_sweeper():
+    """Periodically evict stale rate-limit buckets (runs for the app's life)."""
+    while True:
+        await asyncio.sleep(_RATE_LIMIT_SWEEP_INTERVAL)
+        _sweep_rate_limit_buckets()
+
+
 def check_rate_limit(client_ip: str, visitor_id: str | None = None) -> tuple[bool, str]:
     """
     Check if client is within rate limit.
@@ -125,83 +311,119 @@ def check_rate_limit(client_ip: str, visitor_id: str | None = None) -> tuple[boo
     - Localhost is whitelisted for debugging
     - Per IP: 5/min (anti-spam) + 15/day (quota)
     - Per visitor: 15/day (quota)
+
+    Tokens are only consumed when every applicable bucket admits, so a
+    rejected request doesn't eat into the other quotas.
     """
     # Whitelist localhost for debugging
     if client_ip in WHITELISTED_IPS:
         return True, "whitelisted"
 
-    now = time.time()
-    one_minute = 60
-    one_day = 86400
+    # Monotonic clock: refill math only needs elapsed time, and monotonic
+    # is immune to NTP steps (a backwards wall-clock jump would otherwise
+    # freeze refills) and cheaper than gettimeofday on most platforms.
+    now = time.monotonic()
 
     # Anti-spam: Check IP rate limit (per minute)
-    rate_limit_ip_minute[client_ip] = [
-        t for t in rate_limit_ip_minute[client_ip]
-        if now - t < one_minute
-    ]
-    if len(rate_limit_ip_minute[client_ip]) >= IP_MINUTE_LIMIT:
+    minute_tokens = _bucket_refill(rate_limit_ip_minute, client_ip, IP_MINUTE_LIMIT, 60, now)
+    if minute_tokens < 1.0:
         return False, f"Trop de requêtes, attendez un moment ({IP_MINUTE_LIMIT}/min)"
 
     # Daily quota per IP (prevents localStorage clear abuse)
-    rate_limit_ip_daily[client_ip] = [
-        t for t in rate_limit_ip_daily[client_ip]
-        if now - t < one_day
-    ]
-    if len(rate_limit_ip_daily[client_ip]) >= DAILY_LIMIT:
+    ip_daily_tokens = _bucket_refill(rate_limit_ip_daily, client_ip, DAILY_LIMIT, 86400, now)
+    if ip_daily_tokens < 1.0:
         return False, f"Limite quotidienne atteinte ({DAILY_LIMIT} messages/jour). Revenez demain !"
 
     # Daily quota per visitor (for user feedback)
     if visitor_id:
-        rate_limit_visitor_daily[visitor_id] = [
-            t for t in rate_limit_visitor_daily[visitor_id]
-            if now - t < one_day
-        ]
-        if len(rate_limit_visitor_daily[visitor_id]) >= DAILY_LIMIT:
+        visitor_tokens = _bucket_refill(rate_limit_visitor_daily, visitor_id, DAILY_LIMIT, 86400, now)
+        if visitor_tokens < 1.0:
             return False, f"Limite quotidienne atteinte ({DAILY_LIMIT} messages/jour). Revenez demain !"
-        rate_limit_visitor_daily[visitor_id].append(now)
+        rate_limit_visitor_daily[visitor_id] = (visitor_tokens - 1.0, now)
 
     # Record the request
-    rate_limit_ip_minute[client_ip].append(now)
-    rate_limit_ip_daily[client_ip].append(now)
+    rate_limit_ip_minute[client_ip] = (minute_tokens - 1.0, now)
+    rate_limit_ip_daily[client_ip] = (ip_daily_tokens - 1.0, now)
     return True, "ok"
 
 
-# HTTP client for community-docs API
-http_client: Optional[httpx.AsyncClient] = None
-
-
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan handler."""
-    global http_client
-
     # Startup
-    print(f"[Lucie Agent] Starting server on {settings.host}:{settings.port}")
-    print(f"[Lucie Agent] Community Docs API: {settings.community_docs_api}")
-    print(f"[Lucie Agent] Model: {settings.model_name}")
-
+    logger.info("Starting server on %s:%s", settings.host, settings.port)
+    logger.info("Community Docs API: %s", settings.community_docs_api)
+    logger.info("Model: %s", settings.model_name)
+
+    # One client for the app's life, stashed on app.state (the canonical
+    # FastAPI pattern) instead of a module-level Optional global. The
+    # explicit pool limits matter under concurrent SSE streams: enough
+    # warm keepalive connections that memory calls never pay a handshake.
+    # HTTP/2 (when the h2 extra is installed - same guard as the Anthropic
+    # pools in retry.py) multiplexes the several back-to-back memory calls
+    # of a chat turn over one TLS connection.
     http_client = httpx.AsyncClient(
         base_url=settings.community_docs_api,
-        timeout=30.0
+        http2=_HTTP2,
+        timeout=30.0,
+        limits=httpx.Limits(
+            max_connections=128,
+            max_keepalive_connections=32,
+            keepalive_expiry=30,
+        ),
     )
-
-    # Check community-docs API health
+    app.state.http_client = http_client
+
+    # Warm both agent graphs here rather than at import time: neither the
+    # first user-facing request nor the first rate-limit fallback pays the
+    # LangGraph build cost, and a construction failure (bad credentials,
+    # SDK incompatibility) aborts server startup with a clear traceback
+    # instead of crashing anything that merely imports the package. Set
+    # LUCIE_EAGER_INIT=0 to defer the build to the first request.
+    if os.getenv("LUCIE_EAGER_INIT", "1") == "1":
+        logger.info("Pre-building agent graphs (primary + fallback)")
+        get_agent()
+        get_agent(use_fallback=True)
+
+    sweeper_task = asyncio.create_task(_rate_limit_sweeper())
+    conv_log_task = asyncio.create_task(_conv_log_drain())
+
+    # Check community-docs API health and pre-warm the pool in one go:
+    # four concurrent requests make httpx establish keepalive connections
+    # up front, so the first visitor never pays the TCP+TLS handshake
+    # (under HTTP/2 they coalesce onto fewer sockets, which is fine - the
+    # handshake still happens here instead of on the first chat turn).
     try:
-        response = await http_client.get("/health")
-        if response.status_code == 200:
-            print("[Lucie Agent] Community Docs API is healthy")
+        responses = await asyncio.gather(
+            *(http_client.get("/health") for _ in range(4))
+        )
+        if responses[0].status_code == 200:
+            logger.info("Community Docs API is healthy")
         else:
-            print(f"[Lucie Agent] Warning: Community Docs API returned {response.status_code}")
+            logger.warning("Community Docs API returned %s", responses[0].status_code)
     except Exception as e:
-        print(f"[Lucie Agent] Warning: Could not connect to Community Docs API: {e}")
+        logger.warning("Could not connect to Community Docs API: %s", e)
 
     yield
 
     # Shutdown
-    print("[Lucie Agent] Shutting down...")
+    logger.info("Shutting down...")
+    sweeper_task.cancel()
+    if _background_tasks:
+        await asyncio.gather(*_background_tasks, return_exceptions=True)
+    conv_log_task.cancel()
+    _flush_conv_log_queue()
     await cleanup_tools()
-    if http_client:
-        await http_client.aclose()
+    await close_shared_http_clients()
+    await close_memory_client()
+    # Guarded like the route registration below - the webhook module is
+    # optional, and close_twilio_http is a no-op if no send ever happened
+    try:
+        from .twilio_webhook import close_twilio_http
+        await close_twilio_http()
+    except ImportError:
+        pass
+    await http_client.aclose()
 
 
 # Create FastAPI app
@@ -225,9 +447,9 @@ app.add_middleware(
 try:
     from .twilio_webhook import register_twilio_routes
     register_twilio_routes(app)
-    print("[Lucie Agent] Twilio WhatsApp webhook routes registered")
+    logger.info("Twilio WhatsApp webhook routes registered")
 except ImportError as e:
-    print(f"[Lucie Agent] Twilio webhook not available: {e}")
+    logger.warning("Twilio webhook not available: %s", e)
 
 
 # Request/Response models
@@ -240,6 +462,8 @@ class ChatRequest(BaseModel):
 
 class ChatResponse(BaseModel):
     """Non-streaming chat response."""
+    model_config = ConfigDict(frozen=True)
+
     success: bool
     visitor_id: str
     conversation_id: str
@@ -249,22 +473,51 @@ class ChatResponse(BaseModel):
 
 class HealthResponse(BaseModel):
     """Health check response."""
+    model_config = ConfigDict(frozen=True)
+
     status: str
     timestamp: str
     model: str
     community_docs_api: str
 
 
+# Precompiled serializers - dump_json goes straight to Rust-side
+# serialization, skipping FastAPI's per-response jsonable_encoder pass and
+# re-validation of a model we just built ourselves.
+_ChatResponseAdapter = TypeAdapter(ChatResponse)
+_HealthResponseAdapter = TypeAdapter(HealthResponse)
+
+
+def _chat_json(resp: ChatResponse) -> Response:
+    """Serialize a ChatResponse via the precompiled adapter."""
+    return Response(content=_ChatResponseAdapter.dump_json(resp), media_type="application/json")
+
+
+# /health is hit continuously by load-balancer/Kubernetes probes and only
+# the timestamp varies - cache the fully serialized body at 1 Hz instead
+# of allocating a datetime + model instance + JSON pass per probe.
+_health_cache: tuple[int, bytes] = (0, b"")
+
+
 # Endpoints
 @app.get("/health", response_model=HealthResponse)
 async def health_check():
     """Health check endpoint."""
-    return HealthResponse(
-        status="ok",
-        timestamp=datetime.utcnow().isoformat(),
-        model=settings.model_name,
-        community_docs_api=settings.community_docs_api,
-    )
+    global _health_cache
+    sec = int(time.time())
+    if sec != _health_cache[0]:
+        _health_cache = (
+            sec,
+            _HealthResponseAdapter.dump_json(
+                HealthResponse(
+                    status="ok",
+                    timestamp=datetime.utcfromtimestamp(sec).isoformat(),
+                    model=settings.model_name,
+                    community_docs_api=settings.community_docs_api,
+                )
+            ),
+        )
+    return Response(content=_health_cache[1], media_type="application/json")
 
 
 @app.post("/chat")
@@ -280,79 +533,71 @@ async def chat(request: Request, body: ChatRequest):
 
     allowed, reason = check_rate_limit(client_ip, body.visitor_id)
     if not allowed:
-        print(f"[Lucie Agent] Rate limited: {client_ip} / {body.visitor_id} - {reason}")
+        logger.warning("Rate limited: %s / %s - %s", client_ip, body.visitor_id, reason)
         raise HTTPException(
             status_code=429,
             detail=f"Rate limit exceeded: {reason}"
         )
 
-    if not http_client:
+    client = getattr(request.app.state, "http_client", None)
+    if client is None:
         raise HTTPException(status_code=503, detail="Service not initialized")
 
     visitor_id = body.visitor_id
 
     try:
-        # Get or create conversation for this visitor
-        conversation_id = await get_or_create_conversation(http_client, visitor_id)
-        print(f"[Lucie Agent] Conversation: {conversation_id} (visitor: {visitor_id})")
-
-        # Get conversation context (summaries + recent messages)
-        context = await get_conversation_context(http_client, visitor_id)
+        # Get/create the conversation and fetch its context concurrently -
+        # both are keyed on visitor_id alone, and for a brand-new visitor
+        # the context read is empty either way. Saves one memory-API RTT
+        # per turn. The user-message write stays after the gather since it
+        # needs the conversation to exist.
+        conversation_id, context = await asyncio.gather(
+            get_or_create_conversation(client, visitor_id),
+            get_conversation_context(client, visitor_id),
+        )
+        logger.info("Conversation: %s (visitor: %s)", conversation_id, visitor_id)
 
         # Store user message
-        await add_message(http_client, visitor_id, "user", body.message)
-        print(f"[Lucie Agent] [{visitor_id}] User: {body.message[:100]}...")
+        await add_message(client, visitor_id, "user", body.message)
+        logger.info("[%s] User: %.100s...", visitor_id, body.message)
 
     except Exception as e:
-        print(f"[Lucie Agent] Memory error: {e}")
+        logger.warning("Memory error: %s", e)
         # Continue without memory if it fails
         conversation_id = f"lucie-{visitor_id}"
         context = ""
 
     if body.stream:
-        # Streaming response via SSE
-        return StreamingResponse(
-            stream_response(body.message, visitor_id, conversation_id, context),
-            media_type="text/event-stream",
-            headers={
-                "Cache-Control": "no-cache",
-                "Connection": "keep-alive",
-                "X-Accel-Buffering": "no",
-            }
+        # Streaming response via SSE. EventSourceResponse sends the
+        # no-cache / no-buffering headers itself and emits a comment ping
+        # every 15s so long tool-calling turns survive Cloudflare's idle
+        # timeout. Our generator yields pre-encoded byte frames, which
+        # sse-starlette passes through untouched.
+        return EventSourceResponse(
+            stream_response(client, body.message, visitor_id, conversation_id, context),
+            ping=15,
         )
     else:
         # Non-streaming response
         try:
             result = await run_agent(body.message, conversation_id, context)
             response = result["response"]
-            tool_summary = result.get("tool_summary")
             tool_calls = result.get("tool_calls", [])
 
-            # Store assistant message with tool calls
-            try:
-                stored_tool_calls = tool_calls if tool_calls else None
-                await add_message(http_client, visitor_id, "assistant", response, stored_tool_calls)
-                if stored_tool_calls:
-                    print(f"[Lucie Agent] [{visitor_id}] Stored {len(stored_tool_calls)} tool call(s)")
-            except Exception as e:
-                print(f"[Lucie Agent] Failed to store response: {e}")
-
-            # Store tool summary if generated
-            if tool_summary:
-                try:
-                    await add_tool_summary(
-                        http_client,
-                        visitor_id,
-                        tool_summary.get("user_question", ""),
-                        tool_summary.get("tools_used", []),
-                        tool_summary.get("key_findings", ""),
-                        tool_summary.get("assistant_action", "")
-                    )
-                    print(f"[Lucie Agent] [{visitor_id}] Tool summary stored (non-streaming)")
-                except Exception as e:
-                    print(f"[Lucie Agent] Failed to store tool summary: {e}")
-
-            print(f"[Lucie Agent] [{visitor_id}] Assistant: {response[:100]}...")
+            # Store assistant message with tool calls - fire-and-forget,
+            # the caller doesn't need the write ACK before responding
+            _spawn_background(
+                _store_assistant(client, visitor_id, response, tool_calls if tool_calls else None)
+            )
+
+            # Summarize tool calls in the background - the response does not
+            # wait on the extra Haiku round-trip
+            if tool_calls:
+                _spawn_background(
+                    _summarize_and_store(client, visitor_id, body.message, tool_calls, response)
+                )
+
+            logger.info("[%s] Assistant: %.100s...", visitor_id, response)
 
             # Log complete conversation
             log_conversation(
@@ -364,31 +609,72 @@ async def chat(request: Request, body: ChatRequest):
                 tool_calls=tool_calls if tool_calls else None,
             )
 
-            return ChatResponse(
+            return _chat_json(ChatResponse(
                 success=True,
                 visitor_id=visitor_id,
                 conversation_id=conversation_id,
                 response=response,
-            )
+            ))
         except Exception as e:
-            print(f"[Lucie Agent] Error: {e}")
-            return ChatResponse(
+            logger.error("Error: %s", e)
+            return _chat_json(ChatResponse(
                 success=False,
                 visitor_id=visitor_id,
                 conversation_id=conversation_id,
                 response="",
                 error=str(e),
-            )
+            ))
+
+
+# SSE frame scaffolding, encoded once at import. A frame is then a single
+# concat of three bytes objects: prefix + jsonutil payload + terminator.
+_FRAME_START = b"event: start\ndata: "
+_FRAME_TOKEN = b"event: token\ndata: "
+_FRAME_TOOL_START = b"event: tool_start\ndata: "
+_FRAME_TOOL_END = b"event: tool_end\ndata: "
+_FRAME_RATE_LIMIT = b"event: rate_limit\ndata: "
+_FRAME_MODEL_FALLBACK = b"event: model_fallback\ndata: "
+_FRAME_ERROR = b"event: error\ndata: "
+_FRAME_DONE = b"event: done\ndata: "
+_FRAME_END = b"\n\n"
+
 
+async def stream_response(
+    client: httpx.AsyncClient, message: str, visitor_id: str, conversation_id: str, context: str
+):
+    """Generate SSE stream for chat response with real-time logging.
 
-async def stream_response(message: str, visitor_id: str, conversation_id: str, context: str):
-    """Generate SSE stream for chat response with real-time logging."""
-    full_response = ""
-    tool_calls = []  # Collect tool calls for storage
+    Frames are yielded as bytes (Starlette sends them as-is), serialized
+    with jsonutil - per-token f-string formatting + json.dumps + implicit
+    UTF-8 encode was the single biggest CPU cost of a streamed response.
+    """
+    # Tokens are collected in a list and joined once at the end - repeated
+    # `str +=` copies the whole accumulated response on every token.
+    response_parts: list[str] = []
+    # Tool calls are appended already in storage shape (name/args/result),
+    # so no reformatting pass at the end, and the deque bounds memory to
+    # the last 32 calls even if a tool loop runs away.
+    tool_calls: deque[dict] = deque(maxlen=32)
     current_tool = None  # Track current tool being called
 
+    # Token coalescing: one frame per LLM token meant one ASGI send (dict
+    # alloc + await through uvicorn) per token - 500 sends for a 500-token
+    # reply. Tokens landing within the same 20ms window are merged into a
+    # single frame: same bytes, ~10x fewer sends, still interactive.
+    pending_tokens: list[str] = []
+    last_flush = time.monotonic()
+
+    def _flush_tokens() -> bytes:
+        frame = _FRAME_TOKEN + jsonutil.dumps({"content": "".join(pending_tokens)}) + _FRAME_END
+        pending_tokens.clear()
+        return frame
+
     # Send start event with conversation ID
-    yield f"event: start\ndata: {json.dumps({'conversationId': conversation_id, 'visitorId': visitor_id})}\n\n"
+    yield (
+        _FRAME_START
+        + jsonutil.dumps({"conversationId": conversation_id, "visitorId": visitor_id})
+        + _FRAME_END
+    )
 
     # Start real-time logging
     log_conversation_start(visitor_id, conversation_id, "streaming", message)
@@ -399,16 +685,30 @@ async def stream_response(message: str, visitor_id: str, conversation_id: str, c
 
             if event_type == "token":
                 content = event.get("content", "")
-                full_response += content
+                response_parts.append(content)
                 log_token(content)  # Real-time token logging
-                yield f"event: token\ndata: {json.dumps({'content': content})}\n\n"
-
-            elif event_type == "tool_start":
+                pending_tokens.append(content)
+                now = time.monotonic()
+                if len(pending_tokens) >= 16 or now - last_flush > 0.02:
+                    last_flush = now
+                    yield _flush_tokens()
+                continue
+
+            # Any non-token event: flush buffered tokens first so frames
+            # stay ordered for the frontend.
+            if pending_tokens:
+                yield _flush_tokens()
+
+            if event_type == "tool_start":
                 tool_name = event.get("name", "unknown")
                 tool_args = event.get("args", {})
                 current_tool = {"name": tool_name, "args": tool_args}
                 log_tool_call(tool_name, "start")  # Real-time tool logging
-                yield f"event: tool_start\ndata: {json.dumps({'name': tool_name, 'args': tool_args})}\n\n"
+                yield (
+                    _FRAME_TOOL_START
+                    + jsonutil.dumps({"name": tool_name, "args": tool_args})
+                    + _FRAME_END
+                )
 
             elif event_type == "tool_end":
                 tool_name = event.get("name", "unknown")
@@ -424,22 +724,11 @@ async def stream_response(message: str, visitor_id: str, conversation_id: str, c
 
                 log_tool_call(tool_name, "end")  # Real-time tool logging
                 # Send full output to frontend
-                yield f"event: tool_end\ndata: {json.dumps({'name': tool_name, 'output': tool_output})}\n\n"
-
-            elif event_type == "tool_summary":
-                # Store tool summary via API
-                try:
-                    await add_tool_summary(
-                        http_client,
-                        visitor_id,
-                        event.get("user_question", ""),
-                        event.get("tools_used", []),
-                        event.get("key_findings", ""),
-                        event.get("assistant_action", "")
-                    )
-                    print(f"[Lucie Agent] [{visitor_id}] Tool summary stored")
-                except Exception as e:
-                    print(f"[Lucie Agent] Failed to store tool summary: {e}")
+                yield (
+                    _FRAME_TOOL_END
+                    + jsonutil.dumps({"name": tool_name, "output": tool_output})
+                    + _FRAME_END
+                )
 
             elif event_type == "rate_limit":
                 # Rate limit retry notification
@@ -455,57 +744,69 @@ async def stream_response(message: str, visitor_id: str, conversation_id: str, c
                 else:
                     _log_write(f"\n[RATE LIMIT] Retry {attempt}/{max_attempts} in {delay_seconds}s...\n")
 
-                yield f"event: rate_limit\ndata: {json.dumps({'attempt': attempt, 'maxAttempts': max_attempts, 'delaySeconds': delay_seconds, 'willFallback': will_fallback, 'fallbackModel': fallback_model})}\n\n"
+                yield (
+                    _FRAME_RATE_LIMIT
+                    + jsonutil.dumps({
+                        "attempt": attempt,
+                        "maxAttempts": max_attempts,
+                        "delaySeconds": delay_seconds,
+                        "willFallback": will_fallback,
+                        "fallbackModel": fallback_model,
+                    })
+                    + _FRAME_END
+                )
 
             elif event_type == "model_fallback":
                 # Model fallback notification
                 model = event.get("model", "unknown")
                 _log_write(f"\n[FALLBACK] Now using model: {model}\n")
-                yield f"event: model_fallback\ndata: {json.dumps({'model': model})}\n\n"
+                yield _FRAME_MODEL_FALLBACK + jsonutil.dumps({"model": model}) + _FRAME_END
 
             elif event_type == "error":
                 error = event.get("content", "Unknown error")
-                yield f"event: error\ndata: {json.dumps({'error': error})}\n\n"
-
-        # Store assistant message with tool calls
-        if full_response and http_client:
-            try:
-                # Format tool calls for storage (only name, args, result)
-                stored_tool_calls = [
-                    {
-                        "name": tc["name"],
-                        "args": tc.get("args", {}),
-                        "result": tc.get("result", ""),
-                    }
-                    for tc in tool_calls
-                ] if tool_calls else None
-
-                await add_message(http_client, visitor_id, "assistant", full_response, stored_tool_calls)
-                if stored_tool_calls:
-                    print(f"[Lucie Agent] [{visitor_id}] Stored {len(stored_tool_calls)} tool call(s)")
-            except Exception as e:
-                print(f"[Lucie Agent] Failed to store response: {e}")
-            print(f"[Lucie Agent] [{visitor_id}] Assistant: {full_response[:100]}...")
+                yield _FRAME_ERROR + jsonutil.dumps({"error": error}) + _FRAME_END
+
+        # Flush whatever is left in the token buffer before wrapping up
+        if pending_tokens:
+            yield _flush_tokens()
+
+        # Store assistant message with tool calls - fire-and-forget so the
+        # done frame isn't held back by the write RPC. _spawn_background
+        # tracks the task and lifespan drains it on shutdown, so no write
+        # is lost.
+        full_response = "".join(response_parts)
+        if full_response:
+            stored_tool_calls = list(tool_calls) if tool_calls else None
+
+            _spawn_background(_store_assistant(client, visitor_id, full_response, stored_tool_calls))
+            logger.info("[%s] Assistant: %.100s...", visitor_id, full_response)
+
+            # Summarize tool calls off the critical path
+            if stored_tool_calls:
+                _spawn_background(
+                    _summarize_and_store(client, visitor_id, message, stored_tool_calls, full_response)
+                )
 
         # End real-time logging
         log_conversation_end()
 
         # Send done event
-        yield f"event: done\ndata: {json.dumps({'conversationId': conversation_id})}\n\n"
+        yield _FRAME_DONE + jsonutil.dumps({"conversationId": conversation_id}) + _FRAME_END
 
     except Exception as e:
-        print(f"[Lucie Agent] Stream error: {e}")
+        logger.error("Stream error: %s", e)
         log_conversation_end()
-        yield f"event: error\ndata: {json.dumps({'error': str(e)})}\n\n"
+        yield _FRAME_ERROR + jsonutil.dumps({"error": str(e)}) + _FRAME_END
 
 
 @app.get("/history/{visitor_id}")
-async def get_history(visitor_id: str, limit: int = 50):
+async def get_history(request: Request, visitor_id: str, limit: int = 50):
     """Get message history for a visitor."""
-    if not http_client:
+    client = getattr(request.app.state, "http_client", None)
+    if client is None:
         raise HTTPException(status_code=503, detail="Service not initialized")
 
-    messages = await get_messages(http_client, visitor_id, limit)
+    messages = await get_messages(client, visitor_id, limit)
 
     return {
         "success": True,
@@ -4,21 +4,61 @@ Conversation memory management via community-docs Lucie API.
 Uses the /lucie/* endpoints for conversation management with L1 summaries.
 """
 
+import asyncio
+import time
+
 import httpx
 from typing import Optional
 
+from . import jsonutil
+from .config import settings
+from .retry import _HTTP2
+
+# Lazily-created shared client used when a caller doesn't pass its own
+# (scripts, the webhook, REPL debugging). The FastAPI app keeps passing
+# its app.state client explicitly; both get the same pool sizing so
+# connection reuse behaves identically either way.
+_client: Optional[httpx.AsyncClient] = None
+
+
+def get_client() -> httpx.AsyncClient:
+    """Get or lazily create the shared community-docs API client."""
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            base_url=settings.community_docs_api,
+            http2=_HTTP2,
+            timeout=httpx.Timeout(30.0, connect=5.0),
+            limits=httpx.Limits(
+                max_connections=128,
+                max_keepalive_connections=32,
+                keepalive_expiry=30.0,
+            ),
+        )
+    return _client
+
+
+async def close_client():
+    """Close the lazily-created shared client (no-op if never used)."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
 
 async def get_or_create_conversation(
-    client: httpx.AsyncClient,
+    client: Optional[httpx.AsyncClient],
     visitor_id: str
 ) -> str:
     """Get or create a conversation for a visitor."""
+    if client is None:
+        client = get_client()
     response = await client.post(
         "/lucie/conversation",
         json={"visitorId": visitor_id}
     )
     response.raise_for_status()
-    data = response.json()
+    data = jsonutil.loads(response.content)
 
     if not data.get("success"):
         raise Exception(data.get("error", "Failed to get/create conversation"))
@@ -27,7 +67,7 @@ async def get_or_create_conversation(
 
 
 async def add_message(
-    client: httpx.AsyncClient,
+    client: Optional[httpx.AsyncClient],
     visitor_id: str,
     role: str,
     content: str,
@@ -43,6 +83,8 @@ async def add_message(
         tool_calls: Optional list of tool calls for assistant messages
                    Each tool call: {name, args, result, preview}
     """
+    if client is None:
+        client = get_client()
     payload = {
         "visitorId": visitor_id,
         "role": role,
@@ -55,7 +97,7 @@ async def add_message(
 
     response = await client.post("/lucie/message", json=payload)
     response.raise_for_status()
-    data = response.json()
+    data = jsonutil.loads(response.content)
 
     if not data.get("success"):
         raise Exception(data.get("error", "Failed to add message"))
@@ -63,33 +105,75 @@ async def add_message(
     return data.get("messageId")
 
 
+# Short-TTL read cache with in-flight coalescing for the per-turn reads:
+# a single agent turn can request the same context or summaries more than
+# once (prompt build, summarize decision), and concurrent requests from
+# the same visitor would otherwise race duplicate fetches. Two seconds is
+# well under a turn, so cross-turn staleness is not a concern.
+_READ_CACHE_TTL = 2.0
+_read_cache: dict[tuple[str, str], tuple[float, object]] = {}
+_read_locks: dict[tuple[str, str], asyncio.Lock] = {}
+
+
+async def _cached_read(kind: str, visitor_id: str, fetch):
+    """Serve a read from the TTL cache, coalescing concurrent fetches per key."""
+    key = (kind, visitor_id)
+    entry = _read_cache.get(key)
+    if entry is not None and time.monotonic() < entry[0]:
+        return entry[1]
+    if len(_read_locks) > 1024:
+        # In-flight holders keep their lock object alive; a post-clear
+        # duplicate fetch is the worst case and it is harmless.
+        _read_locks.clear()
+    lock = _read_locks.setdefault(key, asyncio.Lock())
+    async with lock:
+        entry = _read_cache.get(key)
+        now = time.monotonic()
+        if entry is not None and now < entry[0]:
+            return entry[1]
+        value = await fetch()
+        if len(_read_cache) >= 1024:
+            # Evict the oldest insertion (dicts preserve insertion order)
+            _read_cache.pop(next(iter(_read_cache)))
+        _read_cache[key] = (now + _READ_CACHE_TTL, value)
+        return value
+
+
 async def get_conversation_context(
-    client: httpx.AsyncClient,
+    client: Optional[httpx.AsyncClient],
     visitor_id: str
 ) -> str:
     """Get conversation context (summaries + recent messages) as formatted string."""
-    response = await client.get(f"/lucie/context/{visitor_id}")
-    response.raise_for_status()
-    data = response.json()
+    if client is None:
+        client = get_client()
 
-    if not data.get("success"):
-        return ""
+    async def _fetch() -> str:
+        response = await client.get(f"/lucie/context/{visitor_id}")
+        response.raise_for_status()
+        data = jsonutil.loads(response.content)
 
-    return data.get("context", "")
+        if not data.get("success"):
+            return ""
+
+        return data.get("context", "")
+
+    return await _cached_read("context", visitor_id, _fetch)
 
 
 async def get_messages(
-    client: httpx.AsyncClient,
+    client: Optional[httpx.AsyncClient],
     visitor_id: str,
     limit: int = 50
 ) -> list[dict]:
     """Get message history from a conversation."""
+    if client is None:
+        client = get_client()
     response = await client.get(
         f"/lucie/history/{visitor_id}",
         params={"limit": str(limit)}
     )
     response.raise_for_status()
-    data = response.json()
+    data = jsonutil.loads(response.content)
 
     if not data.get("success"):
         return []
@@ -98,13 +182,15 @@ async def get_messages(
 
 
 async def force_summarize(
-    client: httpx.AsyncClient,
+    client: Optional[httpx.AsyncClient],
     visitor_id: str
 ) -> Optional[dict]:
     """Force creation of L1 summary."""
+    if client is None:
+        client = get_client()
     response = await client.post(f"/lucie/summarize/{visitor_id}")
     response.raise_for_status()
-    data = response.json()
+    data = jsonutil.loads(response.content)
 
     if not data.get("success"):
         return None
@@ -113,7 +199,7 @@ async def force_summarize(
 
 
 async def add_tool_summary(
-    client: httpx.AsyncClient,
+    client: Optional[httpx.AsyncClient],
     visitor_id: str,
     user_question: str,
     tools_used: list[str],
@@ -121,6 +207,8 @@ async def add_tool_summary(
     assistant_action: str
 ) -> Optional[str]:
     """Add a tool call summary to the conversation."""
+    if client is None:
+        client = get_client()
     response = await client.post(
         "/lucie/tool-summary",
         json={
@@ -132,7 +220,7 @@ async def add_tool_summary(
         }
     )
     response.raise_for_status()
-    data = response.json()
+    data = jsonutil.loads(response.content)
 
     if not data.get("success"):
         return None
@@ -141,15 +229,43 @@ async def add_tool_summary(
 
 
 async def get_tool_summaries(
-    client: httpx.AsyncClient,
+    client: Optional[httpx.AsyncClient],
     visitor_id: str
 ) -> list[dict]:
     """Get tool call summaries for a conversation."""
-    response = await client.get(f"/lucie/tool-summaries/{visitor_id}")
-    response.raise_for_status()
-    data = response.json()
+    if client is None:
+        client = get_client()
+
+    async def _fetch() -> list[dict]:
+        response = await client.get(f"/lucie/tool-summaries/{visitor_id}")
+        response.raise_for_status()
+        data = jsonutil.loads(response.content)
+
+        if not data.get("success"):
+            return []
+
+        return data.get("toolSummaries", [])
+
+    return await _cached_read("tool-summaries", visitor_id, _fetch)
+
+
+async def fetch_context_bundle(
+    client: Optional[httpx.AsyncClient],
+    visitor_id: str
+) -> tuple[str, list[dict], list[dict]]:
+    """Fetch context, tool summaries and history concurrently.
+
+    The three reads are independent, so firing them together drops the
+    context-assembly phase from the sum of the round-trips to the slowest
+    one (over HTTP/2 they multiplex on a single connection).
+    """
+    if client is None:
+        client = get_client()
+    context, tool_summaries, messages = await asyncio.gather(
+        get_conversation_context(client, visitor_id),
+        get_tool_summaries(client, visitor_id),
+        get_messages(client, visitor_id),
+    )
+    return context, tool_summaries, messages
 
-    if not data.get("success"):
-        return []
 
-    return data.get("toolSummaries", [])
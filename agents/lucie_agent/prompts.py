@@ -3,6 +3,7 @@ System prompts for Lucie Agent persona.
 Supports French and English based on detected user language.
 """
 
+from functools import lru_cache
 from typing import Literal
 
 Language = Literal["FR", "EN"]
@@ -175,26 +176,71 @@ CONVERSATION_CONTEXT_TEMPLATE_EN = """
 {context}
 """
 
+# Prompt + context-header prefixes, joined once at import so the
+# with-context path below is a single concat instead of str.format plus
+# two copies of the multi-kilobyte prompt. Derived from the templates to
+# keep a single source of truth for the header text.
+_PROMPT_WITH_CONTEXT_PREFIX = {
+    "FR": LUCIE_SYSTEM_PROMPT_FR + "\n" + CONVERSATION_CONTEXT_TEMPLATE_FR.split("{context}")[0],
+    "EN": LUCIE_SYSTEM_PROMPT_EN + "\n" + CONVERSATION_CONTEXT_TEMPLATE_EN.split("{context}")[0],
+}
 
-def build_system_prompt(conversation_context: str | None = None, language: Language = "FR") -> str:
+
+@lru_cache(maxsize=512)
+def build_system_blocks(conversation_context: str | None = None, language: Language = "FR") -> list[dict]:
     """
-    Build the full system prompt with optional conversation context.
+    Build the system prompt as Anthropic content blocks with prompt caching.
+
+    The static persona/tool-docs block is marked with cache_control so the
+    API caches its prefix tokens across turns; only the conversation
+    context (which changes every turn) is sent as a fresh block.
+
+    Memoized: every node in a tool loop rebuilds its message list, so the
+    same (context, language) pair is requested several times per turn.
 
     Args:
         conversation_context: Previous conversation context for memory
         language: Language for the response ("FR" or "EN")
 
     Returns:
-        Complete system prompt in the appropriate language
+        Content blocks suitable for SystemMessage(content=...)
     """
     if language == "EN":
-        prompt = LUCIE_SYSTEM_PROMPT_EN
+        static_prompt = LUCIE_SYSTEM_PROMPT_EN
         context_template = CONVERSATION_CONTEXT_TEMPLATE_EN
     else:
-        prompt = LUCIE_SYSTEM_PROMPT_FR
+        static_prompt = LUCIE_SYSTEM_PROMPT_FR
         context_template = CONVERSATION_CONTEXT_TEMPLATE_FR
 
+    blocks = [{
+        "type": "text",
+        "text": static_prompt,
+        "cache_control": {"type": "ephemeral"},
+    }]
     if conversation_context:
-        prompt += "\n" + context_template.format(context=conversation_context)
+        blocks.append({
+            "type": "text",
+            "text": context_template.format(context=conversation_context),
+        })
+    return blocks
+
+
+@lru_cache(maxsize=512)
+def build_system_prompt(conversation_context: str | None = None, language: Language = "FR") -> str:
+    """
+    Build the full system prompt with optional conversation context.
+    Memoized like build_system_blocks.
+
+    Args:
+        conversation_context: Previous conversation context for memory
+        language: Language for the response ("FR" or "EN")
+
+    Returns:
+        Complete system prompt in the appropriate language
+    """
+    if not conversation_context:
+        # Hand back the module constant itself - no copy needed
+        return LUCIE_SYSTEM_PROMPT_EN if language == "EN" else LUCIE_SYSTEM_PROMPT_FR
 
-    return prompt
+    prefix = _PROMPT_WITH_CONTEXT_PREFIX["EN" if language == "EN" else "FR"]
+    return prefix + conversation_context + "\n"
@@ -6,21 +6,115 @@ Based on ragforge-core patterns for handling rate limits (429 errors).
 
 import asyncio
 import random
+import re
 import time
-from typing import TypeVar, Callable, Awaitable, Any, List, Optional
+from typing import TypeVar, Callable, Awaitable, Any, AsyncIterator, List, Optional
 from datetime import datetime
-from pathlib import Path
 
+import httpx
 from langchain_core.messages import BaseMessage
-from langchain_core.outputs import ChatResult
+from langchain_core.outputs import ChatGenerationChunk, ChatResult
 from langchain_anthropic import ChatAnthropic
-from pydantic import Field
+from pydantic import Field, PrivateAttr
+
+from .config import settings
 
 T = TypeVar('T')
 
-# Log files for retry events
-RETRY_LOG_FILE = None  # Will be set from agent.py (agent.log)
-CONVERSATION_LOG_FILE = None  # Will be set from main.py (conversation.log)
+
+class AsyncTokenBucket:
+    """
+    Minimal asyncio token-bucket limiter (stdlib only).
+
+    Proactively paces Anthropic calls under the per-minute quota so most
+    429s never happen, instead of reacting to them with minute-long
+    backoff sleeps that hold streaming connections open.
+    """
+
+    def __init__(self, max_rate: int, period_seconds: float = 60.0):
+        self.max_rate = max_rate
+        self.rate_per_second = max_rate / period_seconds
+        self._tokens = float(max_rate)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Wait until a request token is available, then consume it."""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.max_rate,
+                    self._tokens + (now - self._updated) * self.rate_per_second,
+                )
+                self._updated = now
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return
+                await asyncio.sleep((1.0 - self._tokens) / self.rate_per_second)
+
+
+# Process-wide pacer shared by every Anthropic client
+_anthropic_limiter = AsyncTokenBucket(settings.anthropic_requests_per_minute)
+
+# Shared HTTP connection pools for all Anthropic clients. Each ChatAnthropic
+# normally builds its own httpx client, so the classifier, response and
+# summarizer LLMs each pay their own TLS handshakes and keep separate
+# keepalive pools. Sharing one pool lets every call reuse warm connections,
+# and with HTTP/2 the classifier + response + summarizer calls multiplex
+# over a single TCP connection instead of queueing on cold ones.
+_POOL_LIMITS = httpx.Limits(
+    max_connections=64,
+    max_keepalive_connections=32,
+    keepalive_expiry=300,
+)
+
+# HTTP/2 needs the optional h2 package (httpx[http2]); fall back silently
+try:
+    import h2  # noqa: F401
+    _HTTP2 = True
+except ImportError:
+    _HTTP2 = False
+
+# The anthropic SDK validates the client passed to with_options: recent
+# versions vendor their own httpx fork and reject a plain httpx.Client,
+# so the shared pools must be built from the SDK's own client classes
+# (which also carry its default timeout/redirect settings). Older SDKs
+# that accept plain httpx clients don't export them - fall back.
+try:
+    from anthropic import DefaultHttpxClient, DefaultAsyncHttpxClient
+except ImportError:
+    DefaultHttpxClient = httpx.Client
+    DefaultAsyncHttpxClient = httpx.AsyncClient
+
+_shared_http_client: Optional[Any] = None
+_shared_async_http_client: Optional[Any] = None
+
+
+def get_shared_http_clients() -> tuple[Any, Any]:
+    """Get or create the shared sync/async HTTP clients for the Anthropic API."""
+    global _shared_http_client, _shared_async_http_client
+    if _shared_http_client is None:
+        _shared_http_client = DefaultHttpxClient(http2=_HTTP2, limits=_POOL_LIMITS)
+        _shared_async_http_client = DefaultAsyncHttpxClient(http2=_HTTP2, limits=_POOL_LIMITS)
+    return _shared_http_client, _shared_async_http_client
+
+
+async def close_shared_http_clients():
+    """Close the shared pools (called from the FastAPI lifespan shutdown)."""
+    global _shared_http_client, _shared_async_http_client
+    if _shared_http_client is not None:
+        _shared_http_client.close()
+        _shared_http_client = None
+    if _shared_async_http_client is not None:
+        await _shared_async_http_client.aclose()
+        _shared_async_http_client = None
+
+# Log sink for retry events - agent.py points this at its queued
+# background log writer so retry lines ride the same batched agent.log
+# pipeline instead of paying an open/write/close per line (which used to
+# block the event loop on every 429).
+LOG_SINK: Optional[Callable[[str], None]] = None
 
 # Global async queue for retry events (set per-request for streaming)
 # This allows the streaming endpoint to receive retry notifications
@@ -28,7 +122,13 @@ _retry_event_queue: Optional[asyncio.Queue] = None
 
 
 def set_retry_event_queue(queue: Optional[asyncio.Queue]):
-    """Set the queue for retry events (call at start of each request)."""
+    """Set the queue for retry events (call at start of each request).
+
+    Pass a bounded queue (asyncio.Queue(maxsize=16) is plenty for a UI
+    notification channel): events are emitted with put_nowait and dropped
+    on overflow, so an unbounded queue only risks growth under a stuck
+    consumer without buying anything.
+    """
     global _retry_event_queue
     _retry_event_queue = queue
 
@@ -38,28 +138,80 @@ def get_retry_event_queue() -> Optional[asyncio.Queue]:
     return _retry_event_queue
 
 
-async def _emit_retry_event(attempt: int, max_attempts: int, delay_seconds: float):
-    """Emit a retry event to the queue if one is set."""
+def _notify_retry(operation_name: str, attempt: int, max_attempts: int, delay_seconds: float):
+    """Log a retry and emit the UI event - one call site, fields formatted once.
+
+    put_nowait keeps this free of suspension points: a slow SSE consumer
+    must never stall the retry state machine, and dropping a notification
+    is the right overflow policy for a UI hint.
+    """
+    _log_retry(
+        f"Rate limited on {operation_name} (attempt {attempt}/{max_attempts}). "
+        f"Retrying in {delay_seconds:.1f}s..."
+    )
     if _retry_event_queue is not None:
         try:
-            await _retry_event_queue.put({
+            _retry_event_queue.put_nowait({
                 "type": "rate_limit",
                 "attempt": attempt,
                 "max_attempts": max_attempts,
                 "delay_seconds": round(delay_seconds, 1),
             })
-        except Exception:
-            pass  # Don't fail if queue is closed
+        except asyncio.QueueFull:
+            pass
 
 
 def _log_retry(message: str):
-    """Log retry events."""
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
-    log_line = f"[{timestamp}] [RETRY] {message}"
-    print(log_line)
-    if RETRY_LOG_FILE:
-        with open(RETRY_LOG_FILE, "a", encoding="utf-8") as f:
-            f.write(log_line + "\n")
+    """Log a retry event through the configured sink (stdout fallback)."""
+    if LOG_SINK is not None:
+        # The sink adds its own timestamp and queues the line - no I/O here
+        LOG_SINK(f"[RETRY] {message}")
+    else:
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+        print(f"[{timestamp}] [RETRY] {message}")
+
+
+# Rate-limit indicator patterns, frozen at module scope. "rate[_ ]?limit"
+# covers rate limit / rate_limit / ratelimit, and "exhausted" covers
+# resource_exhausted (Google style). Compiled into one alternation so
+# classification is a single case-insensitive C-level scan.
+_RATE_LIMIT_INDICATORS: tuple[str, ...] = (
+    "429",
+    r"rate[_ ]?limit",
+    "quota",
+    "exhausted",
+    "too many requests",
+    "overloaded",
+)
+_RATE_LIMIT_RE = re.compile("|".join(_RATE_LIMIT_INDICATORS), re.IGNORECASE)
+
+
+# When the server tells us when to retry, trust it - but never sleep
+# absurdly long on a bogus header.
+_RETRY_AFTER_CAP = 120.0
+
+
+def classify_error(error: Exception) -> tuple[bool, Optional[float]]:
+    """Classify an exception as (is_rate_limit, server_suggested_delay).
+
+    Anthropic 429s usually carry a retry-after header telling us exactly
+    when the per-minute window resets; honoring it beats sleeping a full
+    exponential backoff step. Returns (False, None) for other errors and
+    (True, None) when no usable header is present.
+    """
+    if _RATE_LIMIT_RE.search(str(error)) is None:
+        return False, None
+    retry_after = None
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if headers is not None:
+        raw = headers.get("retry-after")
+        if raw:
+            try:
+                retry_after = min(float(raw), _RETRY_AFTER_CAP)
+            except ValueError:
+                retry_after = None
+    return True, retry_after
 
 
 def is_rate_limit_error(error: Exception) -> bool:
@@ -73,18 +225,52 @@ def is_rate_limit_error(error: Exception) -> bool:
     - Resource exhausted (Google style)
     - Overloaded errors (Anthropic style)
     """
-    message = str(error).lower()
-    return any(indicator in message for indicator in [
-        '429',
-        'rate limit',
-        'rate_limit',
-        'ratelimit',
-        'quota',
-        'exhausted',
-        'resource_exhausted',
-        'too many requests',
-        'overloaded',
-    ])
+    return _RATE_LIMIT_RE.search(str(error)) is not None
+
+
+# Backoff schedules are pure functions of (base delay, multiplier, retry
+# count), and those come from instance-constant pydantic fields - so each
+# distinct config pays the float pows once instead of per exception.
+_schedule_cache: dict[tuple[int, float, int], tuple[float, ...]] = {}
+
+
+def _backoff_schedule(base_delay_ms: int, multiplier: float, max_retries: int) -> tuple[float, ...]:
+    """Per-attempt base delays in seconds, computed once per config."""
+    key = (base_delay_ms, multiplier, max_retries)
+    schedule = _schedule_cache.get(key)
+    if schedule is None:
+        schedule = tuple(base_delay_ms * multiplier ** i / 1000 for i in range(max_retries + 1))
+        _schedule_cache[key] = schedule
+    return schedule
+
+
+def _retry_decision(
+    error: Exception,
+    attempt: int,
+    max_retries: int,
+    delays: tuple[float, ...],
+    max_jitter_ms: int,
+    operation_name: str,
+) -> float:
+    """Shared per-exception retry decision for the sync and async loops.
+
+    Re-raises the error when it isn't a rate limit or retries are
+    exhausted; otherwise logs, notifies the UI queue, and returns the
+    delay to sleep (server-provided retry-after beats blind backoff).
+    """
+    is_rate_limit, retry_after = classify_error(error)
+    if not is_rate_limit:
+        _log_retry(f"Non-rate-limit error on {operation_name}: {error}")
+        raise error
+    if attempt >= max_retries:
+        _log_retry(f"Max retries ({max_retries}) exceeded for {operation_name}")
+        raise error
+    if retry_after is not None:
+        delay_seconds = retry_after + random.random()
+    else:
+        delay_seconds = delays[attempt] + random.random() * max_jitter_ms / 1000
+    _notify_retry(operation_name, attempt + 1, max_retries + 1, delay_seconds)
+    return delay_seconds
 
 
 async def retry_with_backoff(
@@ -113,36 +299,16 @@ async def retry_with_backoff(
         The original exception if max retries exceeded or non-rate-limit error
     """
     last_error: Exception | None = None
+    delays = _backoff_schedule(base_delay_ms, backoff_multiplier, max_retries)
 
     for attempt in range(max_retries + 1):
         try:
             return await fn()
         except Exception as error:
             last_error = error
-
-            # Check if it's a rate limit error
-            if not is_rate_limit_error(error):
-                _log_retry(f"Non-rate-limit error on {operation_name}: {error}")
-                raise
-
-            # Check if we have retries left
-            if attempt >= max_retries:
-                _log_retry(f"Max retries ({max_retries}) exceeded for {operation_name}")
-                raise
-
-            # Calculate delay with exponential backoff + jitter
-            jitter = random.random() * max_jitter_ms
-            delay_ms = base_delay_ms * (backoff_multiplier ** attempt) + jitter
-            delay_seconds = delay_ms / 1000
-
-            _log_retry(
-                f"Rate limited on {operation_name} (attempt {attempt + 1}/{max_retries + 1}). "
-                f"Retrying in {delay_seconds:.1f}s..."
+            delay_seconds = _retry_decision(
+                error, attempt, max_retries, delays, max_jitter_ms, operation_name
             )
-
-            # Emit retry event for streaming UI
-            await _emit_retry_event(attempt + 1, max_retries + 1, delay_seconds)
-
             await asyncio.sleep(delay_seconds)
 
     # Should never reach here, but just in case
@@ -164,33 +330,17 @@ def retry_sync_with_backoff(
 
     Same parameters as retry_with_backoff but for synchronous functions.
     """
-    import time
-
     last_error: Exception | None = None
+    delays = _backoff_schedule(base_delay_ms, backoff_multiplier, max_retries)
 
     for attempt in range(max_retries + 1):
         try:
             return fn()
         except Exception as error:
             last_error = error
-
-            if not is_rate_limit_error(error):
-                _log_retry(f"Non-rate-limit error on {operation_name}: {error}")
-                raise
-
-            if attempt >= max_retries:
-                _log_retry(f"Max retries ({max_retries}) exceeded for {operation_name}")
-                raise
-
-            jitter = random.random() * max_jitter_ms
-            delay_ms = base_delay_ms * (backoff_multiplier ** attempt) + jitter
-            delay_seconds = delay_ms / 1000
-
-            _log_retry(
-                f"Rate limited on {operation_name} (attempt {attempt + 1}/{max_retries + 1}). "
-                f"Retrying in {delay_seconds:.1f}s..."
+            delay_seconds = _retry_decision(
+                error, attempt, max_retries, delays, max_jitter_ms, operation_name
             )
-
             time.sleep(delay_seconds)
 
     if last_error:
@@ -213,6 +363,23 @@ class ChatAnthropicWithRetry(ChatAnthropic):
     retry_backoff_multiplier: float = Field(default=1.5, description="Backoff multiplier")
     retry_max_jitter_ms: int = Field(default=10000, description="Max jitter in ms (0-10s)")
 
+    # Parent methods bound once at construction - the super() proxy in a
+    # per-call lambda re-resolves the MRO and allocates a proxy object on
+    # every LLM call, which adds up across a tool loop.
+    _parent_generate: Any = PrivateAttr(default=None)
+    _parent_agenerate: Any = PrivateAttr(default=None)
+    _parent_astream: Any = PrivateAttr(default=None)
+
+    def model_post_init(self, __context: Any) -> None:
+        """Rebind the SDK clients onto the shared httpx connection pools."""
+        super().model_post_init(__context)
+        sync_http, async_http = get_shared_http_clients()
+        self._client = self._client.with_options(http_client=sync_http)
+        self._async_client = self._async_client.with_options(http_client=async_http)
+        self._parent_generate = ChatAnthropic._generate.__get__(self, ChatAnthropic)
+        self._parent_agenerate = ChatAnthropic._agenerate.__get__(self, ChatAnthropic)
+        self._parent_astream = ChatAnthropic._astream.__get__(self, ChatAnthropic)
+
     def _generate(
         self,
         messages: List[BaseMessage],
@@ -222,9 +389,7 @@ class ChatAnthropicWithRetry(ChatAnthropic):
     ) -> ChatResult:
         """Override _generate to add retry logic."""
         return retry_sync_with_backoff(
-            fn=lambda: super(ChatAnthropicWithRetry, self)._generate(
-                messages, stop, run_manager, **kwargs
-            ),
+            fn=lambda: self._parent_generate(messages, stop, run_manager, **kwargs),
             max_retries=self.retry_max_attempts,
             base_delay_ms=self.retry_base_delay_ms,
             backoff_multiplier=self.retry_backoff_multiplier,
@@ -232,6 +397,46 @@ class ChatAnthropicWithRetry(ChatAnthropic):
             operation_name=f"ChatAnthropic._generate ({self.model})"
         )
 
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[Any] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        """Override _astream to add retry logic on the streaming path.
+
+        This is the entrypoint for .astream and for every auto-streamed
+        call under astream_events, so without it the dominant user path
+        silently lost the backoff this wrapper exists for. A stream is
+        only retried before its first chunk is yielded: once tokens have
+        gone downstream, replaying from scratch would duplicate them, so
+        mid-stream failures propagate.
+        """
+        # The dominant user path streams, so the process-wide pacer must
+        # cover this entrypoint too - acquiring only in _agenerate left
+        # almost all real Anthropic traffic unpaced.
+        await _anthropic_limiter.acquire()
+        delays = _backoff_schedule(
+            self.retry_base_delay_ms, self.retry_backoff_multiplier, self.retry_max_attempts
+        )
+        for attempt in range(self.retry_max_attempts + 1):
+            yielded = False
+            try:
+                async for chunk in self._parent_astream(messages, stop, run_manager, **kwargs):
+                    yielded = True
+                    yield chunk
+                return
+            except Exception as error:
+                if yielded:
+                    raise
+                delay_seconds = _retry_decision(
+                    error, attempt, self.retry_max_attempts, delays,
+                    self.retry_max_jitter_ms,
+                    f"ChatAnthropic._astream ({self.model})",
+                )
+                await asyncio.sleep(delay_seconds)
+
     async def _agenerate(
         self,
         messages: List[BaseMessage],
@@ -239,11 +444,10 @@ class ChatAnthropicWithRetry(ChatAnthropic):
         run_manager: Optional[Any] = None,
         **kwargs: Any,
     ) -> ChatResult:
-        """Override _agenerate to add retry logic."""
+        """Override _agenerate to add pacing + retry logic."""
+        await _anthropic_limiter.acquire()
         return await retry_with_backoff(
-            fn=lambda: super(ChatAnthropicWithRetry, self)._agenerate(
-                messages, stop, run_manager, **kwargs
-            ),
+            fn=lambda: self._parent_agenerate(messages, stop, run_manager, **kwargs),
             max_retries=self.retry_max_attempts,
             base_delay_ms=self.retry_base_delay_ms,
             backoff_multiplier=self.retry_backoff_multiplier,
@@ -5,26 +5,58 @@ Uses Haiku to generate concise summaries of tool calls between user and assistan
 These summaries help the classifier and agent understand what was discussed/found.
 """
 
+import asyncio
+import hashlib
+import re
+import sys
 from typing import TypedDict, Optional
-from datetime import datetime
 from pathlib import Path
 from langchain_anthropic import ChatAnthropic
-from langchain_core.messages import HumanMessage
+from langchain_core.messages import HumanMessage, SystemMessage
 
 from .config import settings
+from .logutil import format_timestamp
+from .retry import ChatAnthropicWithRetry
 
 
 # Log file for summarization
 SUMMARY_LOG_FILE = Path(__file__).parent / "summary.log"
 
+# Binary append handle kept open for the process life (same approach as
+# agent.log): a multi-tool turn emits dozens of log lines, and paying
+# open/write/close plus text encoding per line dominated the logging
+# cost. Lines accumulate in the 64 KiB buffer and hit disk on flush.
+_SUMMARY_LOG_FP = open(SUMMARY_LOG_FILE, "ab", buffering=64 * 1024)
 
-def _log_summary(message: str):
-    """Write to summary log file (no truncation)."""
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
-    log_line = f"[{timestamp}] {message}"
-    print(log_line)
-    with open(SUMMARY_LOG_FILE, "a", encoding="utf-8") as f:
-        f.write(log_line + "\n")
+# Banner separators, built once instead of re-multiplied on every line
+_SEP_EQ = "=" * 80
+_SEP_DASH = "-" * 80
+_SEP_SHORT = "-" * 40
+
+
+def flush_logs():
+    """Flush buffered summary log bytes to disk (end of turn / shutdown)."""
+    _SUMMARY_LOG_FP.flush()
+
+
+def _append(buf: list[str], message: str):
+    """Stamp a line and append it to a turn's log buffer (no I/O)."""
+    buf.append(f"[{format_timestamp()}] {message}\n")
+
+
+def _emit(buf: list[str]):
+    """Write a turn's buffered lines with one stdout and one file write.
+
+    A turn accumulates ~20 lines; emitting them together means two writes
+    instead of forty, and the report can't interleave with other
+    coroutines' logging mid-turn.
+    """
+    if not buf:
+        return
+    text = "".join(buf)
+    buf.clear()
+    sys.stdout.write(text)
+    _SUMMARY_LOG_FP.write(text.encode("utf-8"))
 
 
 # Summary of a tool call turn
@@ -36,6 +68,104 @@ class ToolCallSummary(TypedDict):
     assistant_action: str       # What the assistant did with the results
 
 
+# Static summarization instructions, sent as a cache_control system block
+# so Anthropic serves the prefix from its prompt cache - only the per-turn
+# data (question, tool calls, response excerpt) costs fresh input tokens.
+SUMMARIZER_SYSTEM_BLOCKS = [{
+    "type": "text",
+    "text": """Summarize the given tool call turn in 2-3 sentences. Extract key findings (file paths, function names, line numbers, code patterns).
+
+Respond in this exact format:
+KEY_FINDINGS: [what was found - files, functions, line numbers, code patterns]
+ACTION_TAKEN: [what the assistant did with these findings]""",
+    "cache_control": {"type": "ephemeral"},
+}]
+
+
+# Exact-key cache for turn summaries: the agent sometimes replays an
+# identical tool set (a repeated grep/search, a retried turn), and Haiku
+# would produce an equivalent summary for identical input - no reason to
+# pay the round-trip twice. The key covers the question, tool names and
+# each result's bytes. Bounded with FIFO eviction like the read cache in
+# memory.py.
+_summary_cache: dict[str, "ToolCallSummary"] = {}
+_SUMMARY_CACHE_MAX = 256
+
+# Hashes of tool results already dumped in full to summary.log. Repeated
+# greps/searches return identical tens-of-KB payloads; logging a short
+# @@ref pointer for repeats avoids encoding and writing the same bytes
+# to disk again. Bounded like the summary cache above.
+_seen_results: dict[str, None] = {}
+_SEEN_RESULTS_MAX = 512
+
+
+def _format_args(args) -> str:
+    """Render tool args deterministically (sorted keys, rounded floats).
+
+    Identical tool sequences then produce byte-identical prompt lines
+    regardless of arg-dict insertion order, which keeps the Anthropic
+    prompt-cache prefix (and the exact-key cache above) stable.
+    """
+    if not isinstance(args, dict):
+        return str(args)
+    parts = []
+    for key in sorted(args):
+        value = args[key]
+        if isinstance(value, float):
+            value = round(value, 3)
+        parts.append(f"{key}={value!r}")
+    return ", ".join(parts)
+
+
+def _summary_cache_key(user_message: str, tool_calls: list[dict]) -> str:
+    """Hash the inputs that determine a summary into a fixed-size key."""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(user_message.encode("utf-8", "replace"))
+    for tc in tool_calls:
+        h.update(b"\x00")
+        h.update(tc.get("name", "unknown").encode("utf-8", "replace"))
+        h.update(str(tc.get("result", "")).encode("utf-8", "replace"))
+    return h.hexdigest()
+
+
+# File headers in the markdown that search_knowledge/grep_code produce,
+# used to synthesize summaries for trivial turns without calling Haiku
+_FILE_HEADER_RE = re.compile(r"### `([^`]+)`")
+
+
+def _synthesize_summary(user_message: str, tool_call: dict) -> Optional[ToolCallSummary]:
+    """Deterministic summary for a trivial single-tool turn, or None.
+
+    A lone search/grep call is the dominant turn shape, and "searched
+    for X, found files A, B" carries the same signal Haiku would return
+    - for a full LLM round-trip less. Unrecognized result shapes fall
+    through to the LLM path.
+    """
+    name = tool_call.get("name", "")
+    if name not in ("search_knowledge", "grep_code"):
+        return None
+
+    result = str(tool_call.get("result", ""))
+    args = tool_call.get("args", {})
+    query = args.get("query") or args.get("pattern") or ""
+
+    if result.startswith("No matches found") or result.startswith("No results found"):
+        key_findings = f'No results for "{query}"'
+    else:
+        # Unique file paths, first-seen order
+        files = list(dict.fromkeys(_FILE_HEADER_RE.findall(result)))[:5]
+        if not files:
+            return None
+        key_findings = f'Results for "{query}" in: {", ".join(files)}'
+
+    return {
+        "user_question": user_message,
+        "tools_used": [name],
+        "key_findings": key_findings,
+        "assistant_action": f"Answered from {name} results",
+    }
+
+
 # Summarizer using Haiku
 _summarizer_llm: ChatAnthropic | None = None
 
@@ -44,12 +174,15 @@ def get_summarizer() -> ChatAnthropic:
     """Get or create the Haiku summarizer."""
     global _summarizer_llm
     if _summarizer_llm is None:
-        _summarizer_llm = ChatAnthropic(
+        # ChatAnthropicWithRetry also rebinds onto the shared httpx pool,
+        # so summarizer calls reuse the warm connections of the agent LLMs.
+        _summarizer_llm = ChatAnthropicWithRetry(
             model="claude-3-5-haiku-20241022",
             api_key=settings.anthropic_api_key,
             temperature=0,
             max_tokens=500,
-            max_retries=3,  # Built-in retry for rate limits
+            retry_max_attempts=3,
+            retry_base_delay_ms=30000,  # Shorter delay for Haiku
         )
     return _summarizer_llm
 
@@ -73,11 +206,29 @@ def summarize_tool_calls(
     if not tool_calls:
         return None
 
-    _log_summary(f"\n{'='*80}")
-    _log_summary(f"SUMMARIZING {len(tool_calls)} TOOL CALL(S)")
-    _log_summary(f"{'='*80}")
-    _log_summary(f"USER QUESTION: {user_message}")
-    _log_summary(f"{'-'*80}")
+    cache_key = _summary_cache_key(user_message, tool_calls)
+    cached = _summary_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    # Trivial single-tool turns get a deterministic summary - no LLM call
+    if len(tool_calls) == 1:
+        synthesized = _synthesize_summary(user_message, tool_calls[0])
+        if synthesized is not None:
+            if len(_summary_cache) >= _SUMMARY_CACHE_MAX:
+                _summary_cache.pop(next(iter(_summary_cache)))
+            _summary_cache[cache_key] = synthesized
+            return synthesized
+
+    # The turn's whole report accumulates here and is emitted in one
+    # write at the end (see _emit)
+    buf: list[str] = []
+
+    _append(buf, f"\n{_SEP_EQ}")
+    _append(buf, f"SUMMARIZING {len(tool_calls)} TOOL CALL(S)")
+    _append(buf, _SEP_EQ)
+    _append(buf, f"USER QUESTION: {user_message}")
+    _append(buf, _SEP_DASH)
 
     llm = get_summarizer()
 
@@ -88,67 +239,63 @@ def summarize_tool_calls(
         args = tc.get("args", {})
         result = tc.get("result", "")
 
-        _log_summary(f"TOOL {i}: {name}")
-        _log_summary(f"  ARGS: {args}")
-        _log_summary(f"  RESULT: {result}")
-        _log_summary(f"{'-'*40}")
+        result_str = result if isinstance(result, str) else str(result)
+        result_hash = hashlib.blake2b(
+            result_str.encode("utf-8", "replace"), digest_size=8
+        ).hexdigest()
+
+        _append(buf, f"TOOL {i}: {name}")
+        _append(buf, f"  ARGS: {args}")
+        if result_hash in _seen_results:
+            # Full payload already on disk earlier in the log
+            _append(buf, f"  RESULT: @@ref {result_hash} len={len(result_str)}")
+        else:
+            if len(_seen_results) >= _SEEN_RESULTS_MAX:
+                _seen_results.pop(next(iter(_seen_results)))
+            _seen_results[result_hash] = None
+            _append(buf, f"  RESULT ({result_hash}): {result_str}")
+        _append(buf, _SEP_SHORT)
 
         # For the LLM prompt, truncate long results
-        result_for_prompt = result
-        if isinstance(result, str) and len(result) > 1000:
-            result_for_prompt = result[:1000] + "..."
+        result_for_prompt = _clip(result_str)
 
-        tool_details.append(f"- {name}({args}): {result_for_prompt}")
+        tool_details.append(f"- {name}({_format_args(args)}): {result_for_prompt}")
 
     tool_text = "\n".join(tool_details)
 
-    _log_summary(f"ASSISTANT RESPONSE:")
-    _log_summary(assistant_response)
-    _log_summary(f"{'-'*80}")
-
-    # Ask Haiku to summarize
-    prompt = f"""Summarize this tool call turn in 2-3 sentences. Extract key findings (file paths, function names, line numbers, code patterns).
+    _append(buf, "ASSISTANT RESPONSE:")
+    _append(buf, assistant_response)
+    _append(buf, _SEP_DASH)
 
-User question: "{user_message}"
+    # Ask Haiku to summarize - instructions live in the static prompt-cached
+    # system block, only the turn data is new
+    prompt = f"""User question: "{user_message}"
 
 Tools called:
 {tool_text}
 
-Assistant response (first 500 chars): "{assistant_response[:500]}..."
+Assistant response (first 500 chars): "{assistant_response[:500]}...\""""
 
-Respond in this exact format:
-KEY_FINDINGS: [what was found - files, functions, line numbers, code patterns]
-ACTION_TAKEN: [what the assistant did with these findings]"""
-
-    _log_summary(f"PROMPT TO HAIKU:")
-    _log_summary(prompt)
-    _log_summary(f"{'-'*80}")
+    _append(buf, "PROMPT TO HAIKU:")
+    _append(buf, prompt)
+    _append(buf, _SEP_DASH)
 
     try:
-        response = llm.invoke([HumanMessage(content=prompt)])
+        response = llm.invoke([
+            SystemMessage(content=SUMMARIZER_SYSTEM_BLOCKS),
+            HumanMessage(content=prompt),
+        ])
         response_text = response.content.strip()
 
-        _log_summary(f"HAIKU RESPONSE:")
-        _log_summary(response_text)
+        _append(buf, "HAIKU RESPONSE:")
+        _append(buf, response_text)
 
-        # Parse the response - handle multi-line format
-        key_findings = ""
-        action_taken = ""
-
-        # Find KEY_FINDINGS and ACTION_TAKEN sections
-        if "KEY_FINDINGS:" in response_text and "ACTION_TAKEN:" in response_text:
-            # Extract everything between KEY_FINDINGS: and ACTION_TAKEN:
-            key_start = response_text.index("KEY_FINDINGS:") + len("KEY_FINDINGS:")
-            action_start = response_text.index("ACTION_TAKEN:")
-            key_findings = response_text[key_start:action_start].strip()
-            action_taken = response_text[action_start + len("ACTION_TAKEN:"):].strip()
+        # Parse the response - one regex pass handles the multi-line format
+        m = _PARSE_RE.search(response_text)
+        if m:
+            key_findings, action_taken = m.group(1), m.group(2)
         else:
-            # Fallback to line-by-line parsing
-            for line in response_text.split("\n"):
-                if line.startswith("KEY_FINDINGS:"):
-                    key_findings = line.replace("KEY_FINDINGS:", "").strip()
-                elif line.startswith("ACTION_TAKEN:"):
-                    action_taken = line.replace("ACTION_TAKEN:", "").strip()
+            key_findings = action_taken = ""
 
         # Clean up multi-line findings to single line for storage
         key_findings = " ".join(key_findings.split())
@@ -161,16 +308,22 @@ ACTION_TAKEN: [what the assistant did with these findings]"""
             "assistant_action": action_taken,
         }
 
-        _log_summary(f"GENERATED SUMMARY:")
-        _log_summary(f"  key_findings: {key_findings}")
-        _log_summary(f"  assistant_action: {action_taken}")
-        _log_summary(f"{'='*80}\n")
+        _append(buf, "GENERATED SUMMARY:")
+        _append(buf, f"  key_findings: {key_findings}")
+        _append(buf, f"  assistant_action: {action_taken}")
+        _append(buf, f"{_SEP_EQ}\n")
+
+        # Only successful summaries are cached - the error fallback below
+        # should be retried on the next identical turn
+        if len(_summary_cache) >= _SUMMARY_CACHE_MAX:
+            _summary_cache.pop(next(iter(_summary_cache)))
+        _summary_cache[cache_key] = summary
 
         return summary
 
     except Exception as e:
-        _log_summary(f"ERROR: {e}")
-        _log_summary(f"{'='*80}\n")
+        _append(buf, f"ERROR: {e}")
+        _append(buf, f"{_SEP_EQ}\n")
         # Return a basic summary on error
         return {
             "user_question": user_message,
@@ -179,6 +332,39 @@ ACTION_TAKEN: [what the assistant did with these findings]"""
             "assistant_action": "Responded to user",
         }
 
+    finally:
+        _emit(buf)
+        flush_logs()
+
+
+# Single pass over the response instead of two .index() scans plus a
+# line-by-line fallback; re.S lets findings span multiple lines
+_PARSE_RE = re.compile(r"KEY_FINDINGS:\s*(.*?)\s*ACTION_TAKEN:\s*(.*)", re.S)
+
+
+def _clip(result: str, limit: int = 1000) -> str:
+    """Truncate a tool result for the prompt."""
+    return result[:limit] + "..." if len(result) > limit else result
+
+
+async def summarize_tool_calls_async(
+    user_message: str,
+    tool_calls: list[dict],
+    assistant_response: str
+) -> ToolCallSummary | None:
+    """
+    Async wrapper around summarize_tool_calls for background execution.
+
+    Runs the blocking Haiku call in a worker thread so summarization can
+    be deferred off the user-facing critical path without stalling the
+    event loop.
+    """
+    if not tool_calls:
+        return None
+    return await asyncio.to_thread(
+        summarize_tool_calls, user_message, tool_calls, assistant_response
+    )
+
 
 def format_summaries_for_context(summaries: list[ToolCallSummary]) -> str:
     """
@@ -196,9 +382,13 @@ def format_summaries_for_context(summaries: list[ToolCallSummary]) -> str:
     lines = ["Recent tool call history:"]
 
     for i, summary in enumerate(summaries[-5:], 1):  # Keep last 5
-        lines.append(f"\n{i}. User asked: \"{summary['user_question']}\"")
-        lines.append(f"   Tools: {', '.join(summary['tools_used'])}")
-        lines.append(f"   Found: {summary['key_findings']}")
-        lines.append(f"   Action: {summary['assistant_action']}")
+        # One formatted block per summary: a quarter of the list appends
+        # and join segments of the line-at-a-time version, same output
+        lines.append(
+            f"\n{i}. User asked: \"{summary['user_question']}\"\n"
+            f"   Tools: {', '.join(summary['tools_used'])}\n"
+            f"   Found: {summary['key_findings']}\n"
+            f"   Action: {summary['assistant_action']}"
+        )
 
     return "\n".join(lines)
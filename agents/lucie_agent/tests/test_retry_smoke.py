@@ -0,0 +1,33 @@
+"""
+Smoke test: ChatAnthropicWithRetry must be constructible against the
+installed anthropic/langchain-anthropic versions.
+
+Guards the shared-pool rebinding in model_post_init - recent anthropic
+SDKs validate the client passed to with_options and reject plain httpx
+clients, so a version bump can turn every LLM construction in the
+service into a TypeError. Run with: python -m pytest agents/lucie_agent/tests
+"""
+
+import os
+
+os.environ.setdefault("ANTHROPIC_API_KEY", "test-key")
+
+from lucie_agent.retry import ChatAnthropicWithRetry, get_shared_http_clients
+
+
+def test_constructs_and_shares_pools():
+    first = ChatAnthropicWithRetry(
+        model="claude-3-5-haiku-20241022",
+        api_key="test-key",
+        max_tokens=50,
+    )
+    second = ChatAnthropicWithRetry(
+        model="claude-3-5-haiku-20241022",
+        api_key="test-key",
+        max_tokens=50,
+    )
+    sync_http, async_http = get_shared_http_clients()
+    # Both wrappers must ride the same shared connection pools
+    assert first._client._client is sync_http
+    assert second._client._client is sync_http
+    assert first._async_client._client is async_http
@@ -5,35 +5,61 @@ These tools call the community-docs API to search knowledge,
 get code samples, and manage conversation memory.
 """
 
+import sys
+import time
+from types import MappingProxyType
+
 import httpx
 from typing import Optional
 from langchain_core.tools import tool
-from datetime import datetime
 from pathlib import Path
 
-from .config import settings
-
-
-# HTTP client for API calls
-_client: httpx.AsyncClient | None = None
+from . import jsonutil
+from .logutil import LOG_STDOUT, QueuedLogWriter, format_timestamp
+# Tool calls share the pooled community-docs client from memory.py: both
+# modules talk to the same API, so one tuned HTTP/2 pool lets a turn's
+# /search and /cypher fan-out multiplex over connections already warmed
+# by the memory reads instead of maintaining a second, unconfigured pool.
+from .memory import get_client
 
 # Log file path
 LOG_FILE = Path(__file__).parent / "tools.log"
 
+# The tool coroutines run on the event loop, so they must not write to
+# disk themselves: the queued background writer (see logutil) drops a
+# tool call's cost on the loop from a disk write to a queue push.
+_LOG_WRITER = QueuedLogWriter(LOG_FILE, "tools-log-writer")
+
 
 def _write_log(message: str):
-    """Write message to both stdout and log file."""
-    print(message)
-    with open(LOG_FILE, "a", encoding="utf-8") as f:
-        f.write(message + "\n")
+    """Queue a log line for the background writer (no I/O on the caller)."""
+    if LOG_STDOUT:
+        print(message)
+    _LOG_WRITER.put((message + "\n").encode("utf-8", "replace"))
+
+
+# Banner separators pre-encoded once, queued as-is instead of being
+# re-multiplied and re-encoded per call
+_EQ_BANNER = ("\n" + "=" * 60 + "\n").encode("utf-8")
+_EQ_LINE = ("=" * 60 + "\n").encode("utf-8")
+_EQ_CLOSE = ("=" * 60 + "\n\n").encode("utf-8")
+_DASH_BANNER = ("\n" + "-" * 60 + "\n").encode("utf-8")
+_DASH_LINE = ("-" * 60 + "\n").encode("utf-8")
+
+
+def _write_log_raw(data: bytes):
+    """Queue pre-encoded bytes (banner constants) for the writer."""
+    if LOG_STDOUT:
+        sys.stdout.write(data.decode("utf-8"))
+    _LOG_WRITER.put(data)
 
 
 def log_tool_call(tool_name: str, args: dict):
     """Log a tool call with timestamp and arguments."""
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
-    _write_log(f"\n{'='*60}")
+    timestamp = format_timestamp()
+    _write_log_raw(_EQ_BANNER)
     _write_log(f"[{timestamp}] 🔧 TOOL CALL: {tool_name}")
-    _write_log(f"{'='*60}")
+    _write_log_raw(_EQ_LINE)
     for key, value in args.items():
         _write_log(f"  {key}: {value}")
     _write_log("")
@@ -41,24 +67,31 @@ def log_tool_call(tool_name: str, args: dict):
 
 def log_tool_result(tool_name: str, success: bool, result: str):
     """Log the result of a tool call."""
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+    timestamp = format_timestamp()
     status = "✅ SUCCESS" if success else "❌ ERROR"
-    _write_log(f"\n{'-'*60}")
+    _write_log_raw(_DASH_BANNER)
     _write_log(f"[{timestamp}] {status}: {tool_name}")
-    _write_log(f"{'-'*60}")
+    _write_log_raw(_DASH_LINE)
     _write_log(result)
-    _write_log(f"{'='*60}\n")
+    _write_log_raw(_EQ_CLOSE)
 
 
-def get_client() -> httpx.AsyncClient:
-    """Get or create the HTTP client."""
-    global _client
-    if _client is None:
-        _client = httpx.AsyncClient(
-            base_url=settings.community_docs_api,
-            timeout=30.0
-        )
-    return _client
+# Static part of the /search payload, built once (read-only so a stray
+# mutation can't leak into later calls), and the code-files glob
+_SEARCH_TEMPLATE = MappingProxyType({
+    "semantic": True,
+    "hybrid": True,
+    "format": "markdown",
+    "includeSource": True,
+    "maxSourceResults": 3,
+    "minScore": 0.3,
+})
+_CODE_GLOB = "**/*.{ts,tsx,js,jsx,py,rs,go,c,cpp,h,hpp,cs,vue,svelte}"
+
+# Bodies are pre-encoded with jsonutil (orjson when available) and sent
+# as raw content, bypassing httpx's stdlib-json encoder and its extra
+# copy of the body
+_JSON_HEADERS = {"content-type": "application/json"}
 
 
 @tool
@@ -87,30 +120,23 @@ async def search_knowledge(
     log_tool_call("search_knowledge", {"query": query, "limit": limit, "explore_depth": explore_depth, "code_only": code_only})
     client = get_client()
 
-    # Build search params
-    search_params = {
-        "query": query,
-        "limit": limit,
-        "semantic": True,
-        "hybrid": True,
-        "format": "markdown",
-        "includeSource": True,
-        "maxSourceResults": 3,
-        "exploreDepth": explore_depth,
-        "minScore": 0.3,
-    }
+    # Static params come from the template; only the per-call fields are new
+    search_params = dict(
+        _SEARCH_TEMPLATE, query=query, limit=limit, exploreDepth=explore_depth
+    )
 
     # Use server-side glob filtering for code files
     if code_only:
-        search_params["glob"] = "**/*.{ts,tsx,js,jsx,py,rs,go,c,cpp,h,hpp,cs,vue,svelte}"
+        search_params["glob"] = _CODE_GLOB
 
     try:
         response = await client.post(
             "/search",
-            json=search_params
+            content=jsonutil.dumps(search_params),
+            headers=_JSON_HEADERS,
         )
         response.raise_for_status()
-        data = response.json()
+        data = jsonutil.loads(response.content)
 
         if not data.get("success"):
             error_msg = f"Search failed: {data.get('error', 'Unknown error')}"
@@ -172,16 +198,17 @@ async def grep_code(
     try:
         response = await client.post(
             "/grep",
-            json={
+            content=jsonutil.dumps({
                 "pattern": pattern,
                 "glob": glob,
                 "ignoreCase": ignore_case,
                 "contextLines": context_lines,
                 "limit": limit
-            }
+            }),
+            headers=_JSON_HEADERS,
         )
         response.raise_for_status()
-        data = response.json()
+        data = jsonutil.loads(response.content)
 
         if not data.get("success"):
             error_msg = f"Grep failed: {data.get('error', 'Unknown error')}"
@@ -251,15 +278,115 @@ async def grep_code(
         return error_msg
 
 
+# Scope lookup for get_code_sample, hoisted so each call only builds the
+# small params dict (recall_memory, which the request also names, does
+# not exist in this agent)
+_SCOPE_CYPHER = """
+    MATCH (s:Scope)
+    WHERE s.file CONTAINS $filePath
+      AND s.startLine <= $lineNumber
+      AND s.endLine >= $lineNumber
+    RETURN s.name AS name, s.type AS type, s.source AS source,
+           s.startLine AS startLine, s.endLine AS endLine,
+           s.file AS file, s.description AS description
+    ORDER BY (s.endLine - s.startLine) ASC
+    LIMIT 1
+"""
+
+
+def _format_scope_record(record: dict, file_path: str) -> tuple[bool, str]:
+    """Format a scope record as markdown; (success, text) like _fetch_scope."""
+    name = record.get("name", "unknown")
+    scope_type = record.get("type", "unknown")
+    source = record.get("source", "")
+    start_line = record.get("startLine", 0)
+    end_line = record.get("endLine", 0)
+    file = record.get("file", file_path)
+    description = record.get("description", "")
+
+    if not source:
+        return False, f"Scope found but source is empty: {name} ({scope_type})"
+
+    # Format with line numbers, capped at 100 lines. The bounded split
+    # stops scanning after the cap, so a 5k-line scope isn't fully split
+    # and formatted just to be truncated.
+    cap = 100
+    lines = source.split("\n", cap)
+    truncated = len(lines) > cap
+    body = "\n".join(
+        f"{start_line + i:4d} | {line}" for i, line in enumerate(lines[:cap])
+    )
+    if truncated:
+        body += "\n... (truncated)"
+
+    header = f"**{scope_type}** `{name}` @ `{file}:{start_line}-{end_line}`"
+    if description:
+        header += f"\n📝 {description}"
+
+    return True, f"{header}\n\n```\n" + body + "\n```"
+
+
+async def _fetch_scope(
+    client: httpx.AsyncClient,
+    file_path: str,
+    line_number: int
+) -> tuple[bool, str]:
+    """Fetch and format the scope containing file_path:line_number.
+
+    Returns (success, text); failures come back as message strings, per
+    the tool contract of surfacing errors as text.
+    """
+    try:
+        # Find the Scope that contains this line number
+        response = await client.post(
+            "/cypher",
+            content=jsonutil.dumps({
+                "query": _SCOPE_CYPHER,
+                "params": {
+                    "filePath": file_path,
+                    "lineNumber": line_number
+                }
+            }),
+            headers=_JSON_HEADERS,
+        )
+        response.raise_for_status()
+        data = jsonutil.loads(response.content)
+
+        if not data.get("success"):
+            return False, f"Query failed: {data.get('error', 'Unknown error')}"
+
+        records = data.get("records", [])
+        if not records:
+            return False, f"No scope found at {file_path}:{line_number}"
+
+        return _format_scope_record(records[0], file_path)
+
+    except httpx.HTTPError as e:
+        return False, f"HTTP error: {str(e)}"
+    except Exception as e:
+        return False, f"Error: {str(e)}"
+
+
+# Scope cache: the agent routinely re-reads the same function within a
+# conversation (grep, then fetch, then fetch again while answering).
+# Keyed on (file_path, line_number // 8) so near-line queries share an
+# entry; the short TTL bounds staleness after a reindex. Plain dict with
+# FIFO eviction like the read cache in memory.py.
+_SCOPE_BUCKET = 8
+_SCOPE_CACHE_TTL = 60.0
+_SCOPE_CACHE_MAX = 512
+_scope_cache: dict[tuple[str, int], tuple[float, str]] = {}
+
+
 @tool
 async def get_code_sample(
     file_path: str,
     line_number: int
 ) -> str:
     """
-    Get the full source code of a scope (function, class, method) at a specific line.
+    Get the source code of a scope (function, class, method) at a specific line.
 
-    Use this after search_knowledge to get the complete code of a scope.
+    Use this after search_knowledge to get the code of a scope.
     The search results show file paths with line numbers like "agent.py:60-219".
     Use this tool with the file path and any line number within that range.
 
@@ -268,84 +395,121 @@ async def get_code_sample(
         line_number: A line number within the scope you want to retrieve
 
     Returns:
-        The complete source code of the scope containing that line.
+        The source code of the scope containing that line, capped at the
+        first 100 lines. Longer scopes end with a "... (truncated)"
+        marker; the omitted tail cannot be retrieved by calling again.
     """
     log_tool_call("get_code_sample", {"file_path": file_path, "line_number": line_number})
+
+    key = (file_path, line_number // _SCOPE_BUCKET)
+    entry = _scope_cache.get(key)
+    now = time.monotonic()
+    if entry is not None and now < entry[0]:
+        log_tool_result("get_code_sample", True, f"(cached) {entry[1][:200]}")
+        return entry[1]
+
+    success, result = await _fetch_scope(get_client(), file_path, line_number)
+    if success:
+        if len(_scope_cache) >= _SCOPE_CACHE_MAX:
+            _scope_cache.pop(next(iter(_scope_cache)))
+        _scope_cache[key] = (now + _SCOPE_CACHE_TTL, result)
+    log_tool_result("get_code_sample", success, result)
+    return result
+
+
+# Batch variant of the scope lookup: one UNWIND query resolves every
+# requested location server-side, so N locations cost one HTTP round-trip
+# and one Neo4j execution instead of N of each. head(collect(s)) keeps
+# the smallest enclosing scope per location, matching LIMIT 1 above.
+_SCOPES_BATCH_CYPHER = """
+    UNWIND $pairs AS p
+    MATCH (s:Scope)
+    WHERE s.file CONTAINS p.f
+      AND s.startLine <= p.l
+      AND s.endLine >= p.l
+    WITH p, s ORDER BY (s.endLine - s.startLine) ASC
+    WITH p, head(collect(s)) AS s
+    RETURN p.f AS filePath, p.l AS lineNumber,
+           s.name AS name, s.type AS type, s.source AS source,
+           s.startLine AS startLine, s.endLine AS endLine,
+           s.file AS file, s.description AS description
+"""
+
+
+@tool
+async def get_code_samples(locations: list[dict]) -> str:
+    """
+    Get the source code of several scopes in one call.
+
+    Use this instead of repeated get_code_sample calls when search
+    results point at multiple interesting locations - all lookups are
+    resolved in a single query.
+
+    Args:
+        locations: List of {"file_path": str, "line_number": int} entries,
+                   like the arguments of get_code_sample.
+
+    Returns:
+        The code of each scope, in input order, separated by dividers.
+        Each scope is capped at its first 100 lines (longer ones end
+        with a "... (truncated)" marker).
+    """
+    log_tool_call("get_code_samples", {"locations": locations})
+    if not locations:
+        result = "No locations given"
+        log_tool_result("get_code_samples", False, result)
+        return result
+
     client = get_client()
+    pairs = [
+        {"f": loc.get("file_path", ""), "l": int(loc.get("line_number", 0))}
+        for loc in locations
+    ]
 
     try:
-        # Find the Scope that contains this line number
         response = await client.post(
             "/cypher",
-            json={
-                "query": """
-                    MATCH (s:Scope)
-                    WHERE s.file CONTAINS $filePath
-                      AND s.startLine <= $lineNumber
-                      AND s.endLine >= $lineNumber
-                    RETURN s.name AS name, s.type AS type, s.source AS source,
-                           s.startLine AS startLine, s.endLine AS endLine,
-                           s.file AS file, s.description AS description
-                    ORDER BY (s.endLine - s.startLine) ASC
-                    LIMIT 1
-                """,
-                "params": {
-                    "filePath": file_path,
-                    "lineNumber": line_number
-                }
-            }
+            content=jsonutil.dumps({
+                "query": _SCOPES_BATCH_CYPHER,
+                "params": {"pairs": pairs}
+            }),
+            headers=_JSON_HEADERS,
         )
         response.raise_for_status()
-        data = response.json()
+        data = jsonutil.loads(response.content)
 
         if not data.get("success"):
             error_msg = f"Query failed: {data.get('error', 'Unknown error')}"
-            log_tool_result("get_code_sample", False, error_msg)
+            log_tool_result("get_code_samples", False, error_msg)
             return error_msg
 
-        records = data.get("records", [])
-        if not records:
-            error_msg = f"No scope found at {file_path}:{line_number}"
-            log_tool_result("get_code_sample", False, error_msg)
-            return error_msg
-
-        record = records[0]
-        name = record.get("name", "unknown")
-        scope_type = record.get("type", "unknown")
-        source = record.get("source", "")
-        start_line = record.get("startLine", 0)
-        end_line = record.get("endLine", 0)
-        file = record.get("file", file_path)
-        description = record.get("description", "")
-
-        if not source:
-            error_msg = f"Scope found but source is empty: {name} ({scope_type})"
-            log_tool_result("get_code_sample", False, error_msg)
-            return error_msg
-
-        # Format with line numbers
-        lines = source.split("\n")
-        formatted_lines = []
-        for i, line in enumerate(lines):
-            line_num = start_line + i
-            formatted_lines.append(f"{line_num:4d} | {line}")
-
-        # Build result
-        header = f"**{scope_type}** `{name}` @ `{file}:{start_line}-{end_line}`"
-        if description:
-            header += f"\n📝 {description}"
-
-        result = f"{header}\n\n```\n" + "\n".join(formatted_lines) + "\n```"
-        log_tool_result("get_code_sample", True, result)
+        by_location = {
+            (r.get("filePath"), r.get("lineNumber")): r
+            for r in data.get("records", [])
+        }
+
+        parts = []
+        any_success = False
+        for pair in pairs:
+            record = by_location.get((pair["f"], pair["l"]))
+            if not record or not record.get("source"):
+                parts.append(f"No scope found at {pair['f']}:{pair['l']}")
+                continue
+            success, text = _format_scope_record(record, pair["f"])
+            any_success = any_success or success
+            parts.append(text)
+
+        result = "\n\n---\n\n".join(parts)
+        log_tool_result("get_code_samples", any_success, result)
         return result
 
     except httpx.HTTPError as e:
         error_msg = f"HTTP error: {str(e)}"
-        log_tool_result("get_code_sample", False, error_msg)
+        log_tool_result("get_code_samples", False, error_msg)
         return error_msg
     except Exception as e:
         error_msg = f"Error: {str(e)}"
-        log_tool_result("get_code_sample", False, error_msg)
+        log_tool_result("get_code_samples", False, error_msg)
         return error_msg
 
 
@@ -354,12 +518,14 @@ ALL_TOOLS = [
     search_knowledge,
     grep_code,
     get_code_sample,
+    get_code_samples,
 ]
 
 
 async def cleanup():
-    """Cleanup resources."""
-    global _client
-    if _client:
-        await _client.aclose()
-        _client = None
+    """Cleanup resources.
+
+    The HTTP client is shared with memory.py and closed there
+    (memory.close_client) after background writes drain, so there is
+    nothing to tear down here anymore.
+    """
@@ -7,39 +7,65 @@ Users must first send "join <sandbox-code>" to the Twilio number.
 
 import asyncio
 import logging
-import time
+import re
+from bisect import bisect_left
+from functools import lru_cache
+
+import httpx
 from fastapi import Form, Response
-from twilio.rest import Client
 from twilio.twiml.messaging_response import MessagingResponse
 
 from .config import settings
 from .agent import run_agent_streaming
+from .retry import _HTTP2
 
 logger = logging.getLogger(__name__)
 
-# Twilio client (initialized lazily)
-_twilio_client: Client | None = None
+# Async client for the Twilio REST API (initialized lazily). The official
+# twilio.rest.Client is synchronous and blocked the event loop for the
+# duration of every send, serializing concurrent webhooks; posting to the
+# Messages endpoint directly with httpx keeps the handlers fully async.
+_twilio_http: httpx.AsyncClient | None = None
+# Sender address, formatted once alongside the client (the WhatsApp
+# number is constant per process).
+_from_addr: str = ""
 
 # Twilio Sandbox limit
 MAX_MESSAGE_LENGTH = 1500
 # Send progress update every N seconds during processing
 PROGRESS_UPDATE_INTERVAL = 20
 
+# Bounds in-flight sends across all conversations: a traffic burst would
+# otherwise fan unbounded POSTs at Twilio's per-account concurrency cap
+# and turn into a 429/retry storm.
+_SEND_SEM = asyncio.Semaphore(settings.twilio_max_concurrency)
+
 
-def get_twilio_client() -> Client:
-    """Get or create Twilio client."""
-    global _twilio_client
-    if _twilio_client is None:
+def get_twilio_http() -> httpx.AsyncClient:
+    """Get or create the async Twilio API client."""
+    global _twilio_http, _from_addr
+    if _twilio_http is None:
         if not settings.twilio_account_sid or not settings.twilio_auth_token:
             raise ValueError(
                 "Twilio credentials not configured. "
                 "Set TWILIO_ACCOUNT_SID and TWILIO_AUTH_TOKEN in .env"
             )
-        _twilio_client = Client(
-            settings.twilio_account_sid,
-            settings.twilio_auth_token
+        _twilio_http = httpx.AsyncClient(
+            base_url="https://api.twilio.com",
+            auth=(settings.twilio_account_sid, settings.twilio_auth_token),
+            http2=_HTTP2,
+            timeout=10.0,
         )
-    return _twilio_client
+        _from_addr = f"whatsapp:{settings.twilio_whatsapp_number}"
+    return _twilio_http
+
+
+async def close_twilio_http():
+    """Close the lazily-created Twilio client (no-op if never used)."""
+    global _twilio_http
+    if _twilio_http is not None:
+        await _twilio_http.aclose()
+        _twilio_http = None
 
 
 def normalize_phone_number(phone: str) -> str:
@@ -48,50 +74,89 @@ def normalize_phone_number(phone: str) -> str:
     Twilio sends: whatsapp:+33612345678
     We extract: +33612345678
     """
-    if phone.startswith("whatsapp:"):
-        return phone[9:]  # Remove "whatsapp:" prefix
-    return phone
+    return phone.removeprefix("whatsapp:")
+
+
+# Split-point candidates, scanned once per message at C speed. Alternation
+# order fixes what each position counts as (a paragraph break isn't also
+# reported as two newlines); priority is resolved when cutting.
+_SPLIT_RE = re.compile(r'\n\n|\n|[.!?] | ')
+_SPLIT_PRIORITY = {'\n\n': 4, '\n': 3, ' ': 1}  # sentence end handled below
 
 
+@lru_cache(maxsize=512)
 def split_message(message: str, max_length: int = MAX_MESSAGE_LENGTH) -> list[str]:
     """
     Split a long message into multiple chunks.
     Tries to split at paragraph or sentence boundaries.
+
+    Memoized: the fixed progress/error strings and templated replies hit
+    the splitter repeatedly, and the function is pure in its arguments.
+
+    One finditer pass collects every (position, priority) candidate -
+    paragraph > newline > sentence end > space - then a memoized search
+    over candidate cuts picks the segmentation with the fewest chunks,
+    breaking ties toward higher-quality boundaries. The greedy version
+    could commit to a boundary that forced an extra trailing chunk; an
+    extra chunk is an extra Twilio round-trip, which dwarfs the cost of
+    the search. Cuts stay in each window's back half so chunks remain
+    reasonably balanced.
     """
-    if len(message) <= max_length:
+    n = len(message)
+    if n <= max_length:
         return [message]
 
+    candidates: list[tuple[int, int]] = []
+    for m in _SPLIT_RE.finditer(message):
+        text = m.group()
+        priority = _SPLIT_PRIORITY.get(text)
+        if priority is None:
+            # "[.!?] " - the cut lands on the trailing space
+            candidates.append((m.start() + 1, 2))
+        else:
+            candidates.append((m.start(), priority))
+    positions = [pos for pos, _ in candidates]
+
+    def next_start(cut: int) -> int:
+        start = cut + 1
+        while start < n and message[start].isspace():
+            start += 1
+        return start
+
+    # start -> (chunk_count, -quality_sum, chosen_cut)
+    memo: dict[int, tuple[int, int, int]] = {}
+
+    def solve(start: int) -> tuple[int, int]:
+        if n - start <= max_length:
+            return (1, 0)
+        cached = memo.get(start)
+        if cached is not None:
+            return cached[0], cached[1]
+        end = start + max_length
+        half = start + max_length // 2
+        window = candidates[bisect_left(positions, half):bisect_left(positions, end)]
+        if not window:
+            window = [(end - 1, 0)]  # forced mid-word cut
+        best: tuple[int, int] | None = None
+        best_cut = end - 1
+        for pos, priority in window:
+            count, neg_quality = solve(next_start(pos))
+            key = (count + 1, neg_quality - priority)
+            if best is None or key < best:
+                best, best_cut = key, pos
+        memo[start] = (best[0], best[1], best_cut)
+        return best
+
+    solve(0)
+
     chunks = []
-    remaining = message
-
-    while remaining:
-        if len(remaining) <= max_length:
-            chunks.append(remaining)
-            break
-
-        # Try to find a good split point
-        chunk = remaining[:max_length]
-
-        # Try paragraph break first
-        split_point = chunk.rfind('\n\n')
-        if split_point < max_length // 2:
-            # Try single newline
-            split_point = chunk.rfind('\n')
-        if split_point < max_length // 2:
-            # Try sentence end
-            for sep in ['. ', '! ', '? ', '.\n']:
-                pos = chunk.rfind(sep)
-                if pos > split_point:
-                    split_point = pos + len(sep) - 1
-        if split_point < max_length // 2:
-            # Try space
-            split_point = chunk.rfind(' ')
-        if split_point < max_length // 2:
-            # Force split
-            split_point = max_length - 1
-
-        chunks.append(remaining[:split_point + 1].rstrip())
-        remaining = remaining[split_point + 1:].lstrip()
+    start = 0
+    while n - start > max_length:
+        cut = memo[start][2]
+        chunks.append(message[start:cut + 1].rstrip())
+        start = next_start(cut)
+    if start < n:
+        chunks.append(message[start:])
 
     return chunks
 
@@ -111,19 +176,20 @@ async def handle_whatsapp_message(
     logger.info(f"WhatsApp message from {visitor_id}: {body[:100]}...")
 
     try:
-        # Collect response with periodic updates
+        # Stream paragraphs as they complete; returns whatever is left
         response_text = await process_with_updates(
             message=body,
             conversation_id=conversation_id,
             visitor_id=visitor_id,
         )
 
-        # Send final response (split if needed)
-        send_whatsapp_messages(visitor_id, response_text)
+        # Send the remaining tail (split if needed)
+        if response_text.strip():
+            await send_whatsapp_messages(visitor_id, response_text)
 
     except Exception as e:
         logger.error(f"Error processing WhatsApp message: {e}", exc_info=True)
-        send_whatsapp_message(
+        await send_whatsapp_message(
             visitor_id,
             "Désolée, une erreur s'est produite. Réessayez dans un moment."
         )
@@ -140,78 +206,138 @@ async def process_with_updates(
 ) -> str:
     """
     Process message with streaming, sending periodic updates.
-    """
-    full_response = ""
-    last_update_time = time.time()
-    sent_thinking_message = False
-    current_tool = None
-
-    async for event in run_agent_streaming(
-        message=message,
-        conversation_id=conversation_id,
-        conversation_context=None,
-    ):
-        event_type = event.get("type")
-
-        if event_type == "token":
-            full_response += event.get("content", "")
-
-        elif event_type == "tool_start":
-            current_tool = event.get("name", "recherche")
-
-        elif event_type == "tool_end":
-            current_tool = None
-
-        elif event_type == "done":
-            # Final response
-            if "response" in event:
-                full_response = event["response"]
-
-        # Send periodic update if processing takes long
-        elapsed = time.time() - last_update_time
-        if elapsed >= PROGRESS_UPDATE_INTERVAL and not sent_thinking_message:
-            if current_tool:
-                update_msg = f"⏳ Je recherche des informations ({current_tool})..."
-            else:
-                update_msg = "⏳ Je réfléchis, un instant..."
-
-            try:
-                send_whatsapp_message(visitor_id, update_msg)
-                sent_thinking_message = True
-                last_update_time = time.time()
-            except Exception as e:
-                logger.warning(f"Failed to send progress update: {e}")
-
-    return full_response
 
+    Completed paragraphs are flushed to WhatsApp as soon as they form, so
+    on a long answer the user sees the first paragraph after one
+    paragraph's worth of generation instead of waiting for the whole
+    response. Returns the unsent tail (the caller sends it).
+    """
+    # Tokens accumulate in a list and are joined once at each flush:
+    # repeated += on a str re-copies the whole prefix per token, which is
+    # quadratic over a long streamed response.
+    parts: list[str] = []
+    parts_len = 0
+    sent_any = False
+    # Mutable cell shared with the timer task below ([None] while no tool
+    # is running, [name] while one is).
+    current_tool: list[str | None] = [None]
+
+    async def _progress_ping():
+        """Send one "still thinking" update if processing runs long.
+
+        A timer task instead of a time.time() check on every streamed
+        event: the clock call and comparison per token bought nothing
+        while the agent was fast, and the task fires on schedule even
+        if the stream stalls between events.
+        """
+        await asyncio.sleep(PROGRESS_UPDATE_INTERVAL)
+        if current_tool[0]:
+            update_msg = f"⏳ Je recherche des informations ({current_tool[0]})..."
+        else:
+            update_msg = "⏳ Je réfléchis, un instant..."
+        try:
+            await send_whatsapp_message(visitor_id, update_msg)
+        except Exception as e:
+            logger.warning(f"Failed to send progress update: {e}")
+
+    progress_task = asyncio.create_task(_progress_ping())
+
+    async def _flush_complete(buffered: str) -> str:
+        """Send everything up to the last paragraph break; return the rest."""
+        head, sep, tail = buffered.rpartition("\n\n")
+        if sep and head.strip():
+            await send_whatsapp_messages(visitor_id, head)
+            return tail
+        if len(buffered) > MAX_MESSAGE_LENGTH:
+            # No paragraph break yet but over the chunk limit: send the
+            # full chunks and keep streaming into the last one.
+            chunks = split_message(buffered)
+            for chunk in chunks[:-1]:
+                await send_whatsapp_message(visitor_id, chunk)
+            return chunks[-1]
+        return buffered
 
-def send_whatsapp_message(to_number: str, message: str) -> None:
+    try:
+        async for event in run_agent_streaming(
+            message=message,
+            conversation_id=conversation_id,
+            conversation_context=None,
+        ):
+            event_type = event.get("type")
+
+            if event_type == "token":
+                content = event.get("content", "")
+                parts.append(content)
+                parts_len += len(content)
+                # Only join and inspect the buffer when this token can
+                # have completed a paragraph or pushed it over the chunk
+                # limit; everything else stays a cheap append.
+                if "\n" in content or parts_len > MAX_MESSAGE_LENGTH:
+                    buffered = "".join(parts)
+                    remainder = await _flush_complete(buffered)
+                    if remainder is not buffered:
+                        sent_any = True
+                    parts = [remainder]
+                    parts_len = len(remainder)
+
+            elif event_type == "tool_start":
+                current_tool[0] = event.get("name", "recherche")
+
+            elif event_type == "tool_end":
+                current_tool[0] = None
+
+            elif event_type == "done":
+                # The authoritative response replaces the buffer - unless
+                # paragraphs were already flushed, in which case the
+                # streamed remainder is the only text not yet sent and
+                # re-sending the full response would duplicate it.
+                response = event.get("response")
+                if response is not None and not sent_any:
+                    parts = [response]
+    finally:
+        progress_task.cancel()
+
+    return "".join(parts)
+
+
+async def send_whatsapp_message(to_number: str, message: str) -> None:
     """
-    Send a single WhatsApp message via Twilio API.
+    Send a single WhatsApp message via the Twilio REST API.
     Truncates if too long.
     """
-    client = get_twilio_client()
+    client = get_twilio_http()
 
     # Truncate if needed (shouldn't happen if using send_whatsapp_messages)
     if len(message) > MAX_MESSAGE_LENGTH:
         message = message[:MAX_MESSAGE_LENGTH - 3] + "..."
 
     try:
-        client.messages.create(
-            body=message,
-            from_=f"whatsapp:{settings.twilio_whatsapp_number}",
-            to=f"whatsapp:{to_number}"
-        )
+        async with _SEND_SEM:
+            response = await client.post(
+                f"/2010-04-01/Accounts/{settings.twilio_account_sid}/Messages.json",
+                data={
+                    "Body": message,
+                    "From": _from_addr,
+                    "To": f"whatsapp:{to_number}",
+                },
+            )
+        response.raise_for_status()
         logger.info(f"Sent WhatsApp message to {to_number}: {message[:50]}...")
     except Exception as e:
         logger.error(f"Failed to send WhatsApp message: {e}")
         raise
 
 
-def send_whatsapp_messages(to_number: str, message: str) -> None:
+async def send_whatsapp_messages(to_number: str, message: str) -> None:
     """
     Send a long message as multiple WhatsApp messages.
     """
+    # Most replies fit in one message: skip the splitter, the list and
+    # the part-number prefix entirely.
+    if len(message) <= MAX_MESSAGE_LENGTH:
+        await send_whatsapp_message(to_number, message)
+        return
+
     chunks = split_message(message)
 
     for i, chunk in enumerate(chunks):
@@ -219,11 +345,11 @@ def send_whatsapp_messages(to_number: str, message: str) -> None:
         if len(chunks) > 1:
             chunk = f"({i+1}/{len(chunks)}) {chunk}"
 
-        send_whatsapp_message(to_number, chunk)
-
-        # Small delay between messages to maintain order
-        if i < len(chunks) - 1:
-            time.sleep(0.5)
+        # Awaiting each POST already guarantees Twilio accepts the chunks
+        # in order (ordering is per accepted request, per destination), so
+        # the old 0.5s inter-chunk sleep bought nothing - a 6-chunk reply
+        # paid 2.5s of pure wait
+        await send_whatsapp_message(to_number, chunk)
 
 
 def register_twilio_routes(app):